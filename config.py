@@ -13,10 +13,17 @@ CACHE_DIR = Path("data")
 CACHE_FILE = CACHE_DIR / "cache.pkl"
 CACHE_VALIDITY_HOURS = 24
 MARKET_DATA_PERIOD = "1y"
+MARKET_DATA_INTERVAL = "1d"
+MARKET_DATA_TIMEOUT_SECONDS = 30
+MARKET_DATA_DOWNLOAD_THREADS = 16
 MARKET_DATA_MAX_RETRIES = 3
 MARKET_DATA_RETRY_DELAY_SECONDS = 2
 MARKET_DATA_ENABLE_RETRY = True
 
+# Alpaca HTTP connection pool (fixed, not env-driven)
+ALPACA_HTTP_POOL_SIZE = 16
+ORDER_SUBMIT_MAX_WORKERS = 8
+
 # Telegram bot token
 TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
 if not TELEGRAM_BOT_TOKEN:
@@ -28,6 +35,9 @@ ADMIN_IDS = [169675602, 7035744629]
 # Rebalancing interval in trading days
 REBALANCE_INTERVAL_DAYS = 22
 
+# Held positions within this fraction of target value are not adjusted
+REBALANCE_DRIFT_TOLERANCE = 0.05
+
 # Custom tickers to add to S&P 500 list
 CUSTOM_TICKERS = ['RGTI', 'QBTS', 'QUBT']
 
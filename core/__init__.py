@@ -5,8 +5,11 @@ from .market_schedule import MarketSchedule
 from .portfolio_manager import PortfolioManager
 from .alpaca_bot import TradingBot
 from .telegram_bot import TelegramBot
-from .utils import retry_on_exception, telegram_handler, get_positions, run_sync
-from .data_loader import load_market_data, clear_cache, get_snp500_tickers
+from .utils import (
+    retry_on_exception, telegram_handler, get_positions, invalidate_positions_cache,
+    wait_for_closures, diff_tickers, run_sync, CircuitOpenError,
+)
+from .data_loader import load_market_data, clear_cache, get_close_prices, get_snp500_tickers
 from .investor_manager import InvestorManager
 
 __all__ = [
@@ -20,9 +23,14 @@ __all__ = [
     'retry_on_exception',
     'telegram_handler',
     'get_positions',
+    'invalidate_positions_cache',
+    'CircuitOpenError',
+    'wait_for_closures',
+    'diff_tickers',
     'run_sync',
     'load_market_data',
     'clear_cache',
+    'get_close_prices',
     'get_snp500_tickers',
     'InvestorManager',
 ]
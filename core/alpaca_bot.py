@@ -12,8 +12,9 @@ from alpaca.trading.enums import QueryOrderStatus
 from alpaca.trading.requests import GetOrdersRequest
 from apscheduler.schedulers.background import BackgroundScheduler
 from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
 
-from config import (ENVIRONMENT, SNP500_TICKERS, CUSTOM_TICKERS)
+from config import (ENVIRONMENT, SNP500_TICKERS, CUSTOM_TICKERS, ALPACA_HTTP_POOL_SIZE)
 from .data_loader import get_snp500_tickers, load_market_data
 from .investor_manager import InvestorManager
 from .rebalance_flag import RebalanceFlag, NY_TIMEZONE
@@ -105,14 +106,24 @@ class TradingBot:
 
     @staticmethod
     def _create_trading_client(api_key: str, secret_key: str, paper: bool) -> TradingClient:
-        """Factory for TradingClient with correct URL."""
+        """Factory for TradingClient with correct URL and pooled keep-alive session."""
         url_override = "https://paper-api.alpaca.markets" if paper else "https://api.alpaca.markets"
-        return TradingClient(
+        client = TradingClient(
             api_key=api_key,
             secret_key=secret_key,
             paper=paper,
             url_override=url_override
         )
+        # Reuse TLS connections across orders; no urllib3 Retry here because
+        # retrying POST /orders could place duplicate orders.
+        session = getattr(client, '_session', None)
+        if session is not None:
+            adapter = HTTPAdapter(
+                pool_connections=ALPACA_HTTP_POOL_SIZE,
+                pool_maxsize=ALPACA_HTTP_POOL_SIZE
+            )
+            session.mount("https://", adapter)
+        return client
 
     def _resolve_tickers(self, strategy_class: Any) -> list[str]:
         """Choose ticker universe based on strategy configuration."""
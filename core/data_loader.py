@@ -4,10 +4,9 @@ import os
 import pickle
 import time
 from datetime import datetime, timedelta
-from typing import List
+from typing import List, Tuple
 
 import pandas as pd
-import yfinance as yf
 
 from config import (
     ENVIRONMENT,
@@ -18,6 +17,9 @@ from config import (
     CACHE_FILE,
     CACHE_VALIDITY_HOURS,
     MARKET_DATA_PERIOD,
+    MARKET_DATA_INTERVAL,
+    MARKET_DATA_TIMEOUT_SECONDS,
+    MARKET_DATA_DOWNLOAD_THREADS,
     MARKET_DATA_MAX_RETRIES,
     MARKET_DATA_RETRY_DELAY_SECONDS,
     MARKET_DATA_ENABLE_RETRY,
@@ -27,6 +29,10 @@ logger = logging.getLogger(__name__)
 
 FAILED_TICKERS: List[str] = []
 
+# In-process copy of the pickle cache keyed by the file mtime, so repeated
+# signal calculations within one rebalance don't unpickle the frame again.
+_memory_cache: Tuple[float, pd.DataFrame] | None = None
+
 
 def load_market_data() -> pd.DataFrame:
     """Load market data from cache or yfinance using config-defined params."""
@@ -56,6 +62,8 @@ def load_market_data() -> pd.DataFrame:
 
 def clear_cache() -> None:
     """Remove the cached market data file."""
+    global _memory_cache  # pylint: disable=global-statement
+    _memory_cache = None
     cache_path = CACHE_FILE
     if cache_path.exists():
         cache_path.unlink()
@@ -64,6 +72,18 @@ def clear_cache() -> None:
         logger.info("Cache file does not exist")
 
 
+def get_close_prices(data: pd.DataFrame) -> pd.DataFrame:
+    """Return the Close block of a yfinance frame (columns = tickers).
+
+    Uses ``xs`` on the field level instead of ``data['Close']`` so the
+    caller gets the sub-block without an extra chained copy. Single-ticker
+    frames (no MultiIndex) fall back to ``data[['Close']]``.
+    """
+    if isinstance(data.columns, pd.MultiIndex):
+        return data.xs('Close', axis=1, level=0, drop_level=True)
+    return data[['Close']]
+
+
 def get_snp500_tickers() -> List[str]:
     """Return combined ticker universe for all strategies."""
     combined = list(set(SNP500_TICKERS + HIGH_TICKERS + CUSTOM_TICKERS))
@@ -73,6 +93,10 @@ def get_snp500_tickers() -> List[str]:
 
 def _download_with_retry(tickers: List[str]) -> pd.DataFrame:
     """Download market data with retry support, retrying missing tickers."""
+    # Imported lazily: yfinance is only needed on a cache miss and costs
+    # ~0.3s at import time for every process that merely imports core.
+    import yfinance as yf  # pylint: disable=import-outside-toplevel
+
     remaining = list(dict.fromkeys(tickers))
     combined_data: pd.DataFrame | None = None
     last_exception: Exception | None = None
@@ -93,14 +117,23 @@ def _download_with_retry(tickers: List[str]) -> pd.DataFrame:
                 data = yf.download(
                     tickers=remaining,
                     period=MARKET_DATA_PERIOD,
-                    threads=True,
+                    interval=MARKET_DATA_INTERVAL,
+                    # yfinance fetches one ticker per thread; the default pool is
+                    # only 2x CPU count. Concurrent yf.download calls are unsafe
+                    # (shared module state), so widen this pool instead.
+                    threads=MARKET_DATA_DOWNLOAD_THREADS,
                     auto_adjust=True,
                     progress=ENVIRONMENT == "local",
+                    timeout=MARKET_DATA_TIMEOUT_SECONDS,
                 )
 
                 if data is None or data.empty:
                     raise ValueError("No data downloaded from yfinance")
 
+                # Only Close is consumed downstream: drop Open/High/Low/Volume
+                # before concat/caching to keep the frame and the pickle small.
+                data = _keep_close_only(data)
+
                 combined_data = data if combined_data is None else pd.concat([combined_data, data], axis=1)
                 missing = _find_missing_tickers(remaining, data)
 
@@ -151,6 +184,13 @@ def _download_with_retry(tickers: List[str]) -> pd.DataFrame:
     raise last_exception if last_exception else RuntimeError("Market data download failed without exception")
 
 
+def _keep_close_only(data: pd.DataFrame) -> pd.DataFrame:
+    """Prune a yfinance frame to the Close block, keeping the field level."""
+    if isinstance(data.columns, pd.MultiIndex) and 'Close' in data.columns.get_level_values(0):
+        return data[['Close']]
+    return data
+
+
 def _find_missing_tickers(expected: List[str], data: pd.DataFrame) -> List[str]:
     """Return a list of tickers missing from the downloaded dataset."""
     downloaded: set[str] = set()
@@ -158,7 +198,7 @@ def _find_missing_tickers(expected: List[str], data: pd.DataFrame) -> List[str]:
     if isinstance(data.columns, pd.MultiIndex):
         level0 = data.columns.get_level_values(0)
         if 'Close' in level0:
-            close_data = data['Close']
+            close_data = get_close_prices(data)
             # Only include tickers that have at least one valid (non-NaN) value
             downloaded = set(close_data.columns[close_data.notna().any()])
         else:
@@ -204,19 +244,29 @@ def _is_cache_valid() -> bool:
 
 
 def _load_from_cache() -> pd.DataFrame:
-    """Load cached market data."""
+    """Load cached market data, reusing the in-memory copy if the file is unchanged."""
+    global _memory_cache  # pylint: disable=global-statement
     cache_path = CACHE_FILE
+    mtime = os.path.getmtime(cache_path)
+    if _memory_cache is not None and _memory_cache[0] == mtime:
+        logger.debug("Reusing in-memory market data")
+        return _memory_cache[1]
+
     with open(cache_path, "rb") as cache_file:
         data = pickle.load(cache_file)
+    _memory_cache = (mtime, data)
     logger.info("Loaded %d rows from cache", len(data))
     return data
 
 
 def _save_to_cache(data: pd.DataFrame) -> None:
     """Persist market data to cache."""
+    global _memory_cache  # pylint: disable=global-statement
     cache_path = CACHE_FILE
     with open(cache_path, "wb") as cache_file:
-        pickle.dump(data, cache_file)
+        # Highest protocol (5); no buffer_callback, so NumPy blocks are stored in-band
+        pickle.dump(data, cache_file, protocol=pickle.HIGHEST_PROTOCOL)
+    _memory_cache = (os.path.getmtime(cache_path), data)
     logger.debug("Data cached to %s", cache_path)
 
 
@@ -224,5 +274,6 @@ __all__ = [
     "FAILED_TICKERS",
     "load_market_data",
     "clear_cache",
+    "get_close_prices",
     "get_snp500_tickers",
 ]
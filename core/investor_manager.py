@@ -1,16 +1,87 @@
 """Управление инвесторами и их операциями в LiveStrategy."""
+import copy
 import csv
 import logging
+import os
+import sys
+import threading
 from dataclasses import dataclass
 from datetime import datetime
+from decimal import Decimal, ROUND_HALF_UP
 from pathlib import Path
-from typing import Dict, List, Tuple, Optional
+from typing import Dict, Iterable, Iterator, List, Tuple, Optional
 from collections import defaultdict
+from zoneinfo import ZoneInfo
 
-import pytz
+import numpy as np
 from alpaca.trading.client import TradingClient
 
-NY_TIMEZONE = pytz.timezone('America/New_York')
+NY_TIMEZONE = ZoneInfo('America/New_York')
+
+CENT = Decimal('0.01')
+
+# Максимум записей в кэше позиций/P&L
+POSITIONS_CACHE_SIZE = 256
+
+# Распределение депозита по умолчанию (доли в сумме дают 1)
+_SPLITS = (
+    ('low', Decimal('0.45')),
+    ('medium', Decimal('0.35')),
+    ('high', Decimal('0.20')),
+)
+
+# Колонки operations.csv
+OPERATIONS_HEADER = (
+    'date', 'timestamp', 'operation', 'account',
+    'amount', 'status', 'balance_after', 'notes'
+)
+OPS_COL_DATE = 0
+OPS_COL_OPERATION = 2
+OPS_COL_ACCOUNT = 3
+OPS_COL_AMOUNT = 4
+OPS_COL_STATUS = 5
+OPS_COL_BALANCE_AFTER = 6
+
+# Колонки trades.csv
+TRADES_HEADER = (
+    'date', 'timestamp', 'account', 'action', 'ticker',
+    'shares', 'price', 'amount', 'total_shares_after', 'notes'
+)
+TRADES_COL_ACCOUNT = 2
+TRADES_COL_ACTION = 3
+TRADES_COL_TICKER = 4
+TRADES_COL_SHARES = 5
+TRADES_COL_PRICE = 6
+TRADES_COL_AMOUNT = 7
+TRADES_COL_TOTAL_SHARES_AFTER = 8
+
+# Повторяющиеся строковые колонки, которые интернируются при чтении
+_INTERNED_COLUMNS = {
+    'operations.csv': (OPS_COL_OPERATION, OPS_COL_ACCOUNT, OPS_COL_STATUS),
+    'trades.csv': (TRADES_COL_ACCOUNT, TRADES_COL_ACTION, TRADES_COL_TICKER),
+}
+
+
+def _to_cents(value: float) -> Decimal:
+    """Округлить денежную сумму до центов (ROUND_HALF_UP)."""
+    return Decimal(str(value)).quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+def _split_amount(amount: float) -> List[Tuple[str, float]]:
+    """Разбить сумму (депозит или снятие) по _SPLITS в целых центах.
+
+    Остаток от округления уходит на последний счет, поэтому части
+    в сумме точно равны исходной сумме.
+    """
+    cents = int(_to_cents(amount) * 100)
+    parts = []
+    remaining = cents
+    for acc, share in _SPLITS[:-1]:
+        part = int(cents * share)
+        parts.append((acc, part / 100))
+        remaining -= part
+    parts.append((_SPLITS[-1][0], remaining / 100))
+    return parts
 
 
 @dataclass
@@ -29,21 +100,38 @@ class InvestorManager:
     """Управление инвесторами и их операциями."""
 
     # Распределение по умолчанию
-    DEFAULT_ALLOCATION = {'low': 0.45, 'medium': 0.35, 'high': 0.20}
+    DEFAULT_ALLOCATION = {acc: float(share) for acc, share in _SPLITS}
 
-    def __init__(self, registry_path: str = 'investors_registry.csv'):
+    def __init__(self, registry_path: str = 'investors_registry.csv',
+                 investors_dir: str = 'data/investors'):
         """Инициализация менеджера инвесторов.
 
         Args:
             registry_path: Путь к файлу реестра инвесторов
+            investors_dir: Директория с файлами инвесторов
         """
         self.registry_path = Path(registry_path)
-        self.investors_dir = Path('data/investors')
+        self.investors_dir = Path(investors_dir)
         self.investors: Dict[str, Investor] = {}
         self.ny_timezone = NY_TIMEZONE
+        # Кэш распарсенных CSV: {path: ((mtime_ns, size), fieldnames, rows)}
+        self._csv_cache: Dict[Path, Tuple[Tuple[int, int], List[str], List[List[str]]]] = {}
+        # Кэш балансов: {investor: (stamps operations/trades, balance)}
+        self._balance_cache: Dict[str, Tuple[Tuple, Dict]] = {}
+        # Кэш позиций/P&L по trades.csv: {key: (stamp trades, result)}
+        self._positions_cache: Dict[Tuple, Tuple[Tuple[int, int], object]] = {}
+        # Менеджер общий для потока планировщика и обработчиков aiogram
+        self._cache_lock = threading.Lock()
         self._load_registry()
         self._ensure_investor_directories()
 
+    def clear_caches(self) -> None:
+        """Сбросить все внутренние кэши (CSV, балансы, позиции)."""
+        with self._cache_lock:
+            self._csv_cache.clear()
+            self._balance_cache.clear()
+            self._positions_cache.clear()
+
     def _active_investors(self) -> Dict[str, Investor]:
         """Вернуть только активных инвесторов."""
         return {
@@ -115,7 +203,9 @@ class InvestorManager:
 
     def _ensure_investor_directories(self) -> None:
         """Создать папки для всех инвесторов."""
-        self.investors_dir.mkdir(parents=True, exist_ok=True)
+        # parents=True создаст investors_dir вместе с первой папкой инвестора
+        if not self.investors:
+            self.investors_dir.mkdir(parents=True, exist_ok=True)
         for investor_name in self.investors:
             investor_path = self._get_investor_path(investor_name)
             investor_path.mkdir(parents=True, exist_ok=True)
@@ -128,6 +218,81 @@ class InvestorManager:
         """Проверить существование инвестора."""
         return name in self.investors
 
+    @staticmethod
+    def _file_stamp(path: Path) -> Optional[Tuple[int, int]]:
+        """(mtime_ns, size) файла или None, если файла нет."""
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _read_csv(self, path: Path) -> Tuple[List[str], List[List[str]]]:
+        """Прочитать CSV как (header, rows) с кэшем по mtime/size файла.
+
+        Строки — списки значений, адресуемые константами OPS_COL_*/TRADES_COL_*.
+        Возвращаемые строки разделяются между вызовами — не изменять их на месте.
+        """
+        stamp = self._file_stamp(path)
+        with self._cache_lock:
+            cached = self._csv_cache.get(path)
+        if cached is not None and cached[0] == stamp:
+            return cached[1], cached[2]
+
+        with open(path, 'r', newline='', encoding='utf-8') as f:
+            reader = csv.reader(f)
+            header = next(reader, [])
+            rows = [row for row in reader if row]
+
+        # Тикеры/счета/действия повторяются в каждой строке — хранить по одному объекту
+        columns = _INTERNED_COLUMNS.get(path.name, ())
+        for row in rows:
+            for col in columns:
+                if col < len(row):
+                    row[col] = sys.intern(row[col])
+
+        with self._cache_lock:
+            self._csv_cache[path] = (stamp, header, rows)
+        return header, rows
+
+    def _write_csv(self, path: Path, header: List[str],
+                   rows: Iterable[List[str]]) -> None:
+        """Перезаписать CSV и сбросить его запись в кэше.
+
+        Строки пишутся по мере получения из итератора во временный файл,
+        который затем атомарно заменяет исходный. Следующее чтение берет
+        значения с диска (строками), а не объекты, переданные на запись.
+        """
+        tmp_path = path.with_name(path.name + '.tmp')
+        try:
+            with open(tmp_path, 'w', newline='', encoding='utf-8') as f:
+                writer = csv.writer(f)
+                writer.writerow(header)
+                writer.writerows(rows)
+            os.replace(tmp_path, path)
+        except Exception:
+            tmp_path.unlink(missing_ok=True)
+            raise
+        finally:
+            with self._cache_lock:
+                self._csv_cache.pop(path, None)
+
+    def _get_positions_cached(self, key: Tuple, stamp: Tuple[int, int]):
+        """Результат из кэша позиций, если trades.csv не менялся."""
+        with self._cache_lock:
+            cached = self._positions_cache.get(key)
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+        return None
+
+    def _store_positions_cached(self, key: Tuple, stamp: Tuple[int, int], result) -> None:
+        """Сохранить результат в кэш позиций (вытесняя самую старую запись)."""
+        with self._cache_lock:
+            self._positions_cache.pop(key, None)
+            if len(self._positions_cache) >= POSITIONS_CACHE_SIZE:
+                del self._positions_cache[next(iter(self._positions_cache))]
+            self._positions_cache[key] = (stamp, result)
+
     # ==================== ОПЕРАЦИИ ====================
 
     def deposit(self, name: str, amount: float, account: Optional[str] = None,
@@ -164,8 +329,7 @@ class InvestorManager:
             )
         else:
             # Распределение по умолчанию
-            for acc, percentage in self.DEFAULT_ALLOCATION.items():
-                dep_amount = amount * percentage
+            for acc, dep_amount in _split_amount(amount):
                 operation_id = self._create_operation(
                     name, 'deposit', acc, dep_amount, date
                 )
@@ -229,8 +393,7 @@ class InvestorManager:
                     f"${total_balance:.2f} < ${amount:.2f}"
                 )
 
-            for acc, percentage in self.DEFAULT_ALLOCATION.items():
-                withdraw_amount = amount * percentage
+            for acc, withdraw_amount in _split_amount(amount):
                 operation_id = self._create_operation(
                     name, 'withdraw', acc, withdraw_amount, date
                 )
@@ -270,10 +433,7 @@ class InvestorManager:
 
                 # Написать заголовок если файл новый
                 if not file_exists:
-                    writer.writerow([
-                        'date', 'timestamp', 'operation', 'account',
-                        'amount', 'status', 'balance_after', 'notes'
-                    ])
+                    writer.writerow(OPERATIONS_HEADER)
 
                 # Написать строку операции
                 writer.writerow([
@@ -281,7 +441,7 @@ class InvestorManager:
                     timestamp,
                     operation_type,
                     account,
-                    f"{amount:.2f}",
+                    str(_to_cents(amount)),
                     status,
                     balance_after,
                     f"{operation_type.capitalize()} to {account}"
@@ -339,36 +499,31 @@ class InvestorManager:
             return {'processed': 0, 'completed': [], 'failed': []}
 
         results = {'processed': 0, 'completed': [], 'failed': []}
-        updated_rows = []
 
-        try:
-            with open(operations_file, 'r', encoding='utf-8') as f:
-                reader = csv.DictReader(f)
-                header = reader.fieldnames or []
+        def complete_pending(rows: List[List[str]]) -> Iterator[List[str]]:
+            for row in rows:
+                if row[OPS_COL_STATUS] == 'pending':
+                    # Обновить статус на completed (копия: строки кэша не меняем)
+                    row = list(row)
+                    row[OPS_COL_STATUS] = 'completed'
+                    row[OPS_COL_BALANCE_AFTER] = self._calculate_account_balance(
+                        investor, row[OPS_COL_ACCOUNT]
+                    )
+                    results['completed'].append(row[OPS_COL_DATE])
+                    results['processed'] += 1
+                    logging.info(
+                        "Processed pending %s for %s on %s",
+                        row[OPS_COL_OPERATION],
+                        investor,
+                        row[OPS_COL_ACCOUNT]
+                    )
+                yield row
 
-                for row in reader:
-                    if row['status'] == 'pending':
-                        # Обновить статус на completed
-                        row['status'] = 'completed'
-                        row['balance_after'] = self._calculate_account_balance(
-                            investor, row['account']
-                        )
-                        results['completed'].append(row['date'])
-                        results['processed'] += 1
-                        logging.info(
-                            "Processed pending %s for %s on %s",
-                            row['operation'],
-                            investor,
-                            row['account']
-                        )
-
-                    updated_rows.append(row)
+        try:
+            header, rows = self._read_csv(operations_file)
 
             # Перезаписать файл с обновленными статусами
-            with open(operations_file, 'w', newline='', encoding='utf-8') as f:
-                writer = csv.DictWriter(f, fieldnames=header)
-                writer.writeheader()
-                writer.writerows(updated_rows)
+            self._write_csv(operations_file, header, complete_pending(rows))
 
         except Exception as exc:
             logging.error(
@@ -395,17 +550,16 @@ class InvestorManager:
         # 1. Получить balance из operations.csv
         if operations_file.exists():
             try:
-                with open(operations_file, 'r', encoding='utf-8') as f:
-                    reader = csv.DictReader(f)
-                    for row in reader:
-                        if row['account'] == account and row['status'] == 'completed':
-                            amount = float(row['amount'])
-                            if row['operation'] == 'deposit':
-                                balance += amount
-                            elif row['operation'] == 'withdraw':
-                                balance -= amount
-                            elif row['operation'] == 'fee':
-                                balance -= amount
+                _, rows = self._read_csv(operations_file)
+                for row in rows:
+                    if row[OPS_COL_ACCOUNT] == account and row[OPS_COL_STATUS] == 'completed':
+                        amount = float(row[OPS_COL_AMOUNT])
+                        if row[OPS_COL_OPERATION] == 'deposit':
+                            balance += amount
+                        elif row[OPS_COL_OPERATION] == 'withdraw':
+                            balance -= amount
+                        elif row[OPS_COL_OPERATION] == 'fee':
+                            balance -= amount
 
             except Exception as exc:
                 logging.error(
@@ -416,19 +570,18 @@ class InvestorManager:
         # 2. Учитать trades (BUY уменьшает cash, SELL увеличивает)
         if trades_file.exists():
             try:
-                with open(trades_file, 'r', encoding='utf-8') as f:
-                    reader = csv.DictReader(f)
-                    for row in reader:
-                        if row['account'] == account:
-                            action = row['action']
-                            amount = float(row['amount'])
-
-                            if action == 'BUY':
-                                # BUY уменьшает доступный cash
-                                balance -= amount
-                            elif action == 'SELL':
-                                # SELL увеличивает cash
-                                balance += amount
+                _, rows = self._read_csv(trades_file)
+                for row in rows:
+                    if row[TRADES_COL_ACCOUNT] == account:
+                        action = row[TRADES_COL_ACTION]
+                        amount = float(row[TRADES_COL_AMOUNT])
+
+                        if action == 'BUY':
+                            # BUY уменьшает доступный cash
+                            balance -= amount
+                        elif action == 'SELL':
+                            # SELL увеличивает cash
+                            balance += amount
 
             except Exception as exc:
                 logging.error(
@@ -449,18 +602,25 @@ class InvestorManager:
 
         positions = {}
 
-        if not trades_file.exists():
+        stamp = self._file_stamp(trades_file)
+        if stamp is None:
             return positions
 
+        cache_key = ('positions', investor, account)
+        cached = self._get_positions_cached(cache_key, stamp)
+        if cached is not None:
+            return dict(cached)
+
         try:
-            with open(trades_file, 'r', encoding='utf-8') as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    if row['account'] == account:
-                        ticker = row['ticker']
-                        total_shares_after = float(row['total_shares_after'])
-                        # Последняя запись по тикеру - это текущее количество
-                        positions[ticker] = total_shares_after
+            _, rows = self._read_csv(trades_file)
+            for row in rows:
+                if row[TRADES_COL_ACCOUNT] == account:
+                    ticker = row[TRADES_COL_TICKER]
+                    total_shares_after = float(row[TRADES_COL_TOTAL_SHARES_AFTER])
+                    # Последняя запись по тикеру - это текущее количество
+                    positions[ticker] = total_shares_after
+
+            self._store_positions_cached(cache_key, stamp, dict(positions))
 
         except Exception as exc:
             logging.error(
@@ -493,9 +653,16 @@ class InvestorManager:
         realized_pnl = 0.0
         unrealized_pnl = 0.0
 
-        if not trades_file.exists():
+        stamp = self._file_stamp(trades_file)
+        if stamp is None:
             return 0.0, 0.0, 0.0
 
+        prices_key = tuple(sorted(current_prices.items())) if current_prices else None
+        cache_key = ('pnl', investor, account, prices_key)
+        cached = self._get_positions_cached(cache_key, stamp)
+        if cached is not None:
+            return cached
+
         try:
             # Получить текущие позиции
             positions = self._get_investor_positions(investor, account)
@@ -503,40 +670,39 @@ class InvestorManager:
             # Для каждого тикера отслеживать cost basis
             ticker_cost_basis = {}     # {ticker: {total_cost, total_shares, last_price}}
 
-            with open(trades_file, 'r', encoding='utf-8') as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    if row['account'] == account:
-                        ticker = row['ticker']
-                        action = row['action']
-                        shares = float(row['shares'])
-                        price = float(row['price'])
-
-                        # Инициализировать если не существует
-                        if ticker not in ticker_cost_basis:
-                            ticker_cost_basis[ticker] = {
-                                'total_cost': 0.0,
-                                'total_shares': 0.0,
-                                'last_price': price
-                            }
-
-                        data = ticker_cost_basis[ticker]
-                        data['last_price'] = price
-
-                        if action == 'BUY':
-                            data['total_cost'] += shares * price
-                            data['total_shares'] += shares
-                        elif action == 'SELL':
-                            # Расчет realized PnL (FIFO метод)
-                            if data['total_shares'] > 0:
-                                avg_cost = data['total_cost'] / data['total_shares']
-                                sell_revenue = shares * price
-                                cost_of_sold = shares * avg_cost
-                                realized_pnl += sell_revenue - cost_of_sold
+            _, rows = self._read_csv(trades_file)
+            for row in rows:
+                if row[TRADES_COL_ACCOUNT] == account:
+                    ticker = row[TRADES_COL_TICKER]
+                    action = row[TRADES_COL_ACTION]
+                    shares = float(row[TRADES_COL_SHARES])
+                    price = float(row[TRADES_COL_PRICE])
+
+                    # Инициализировать если не существует
+                    if ticker not in ticker_cost_basis:
+                        ticker_cost_basis[ticker] = {
+                            'total_cost': 0.0,
+                            'total_shares': 0.0,
+                            'last_price': price
+                        }
 
-                                # Обновить cost basis
-                                data['total_cost'] = max(0, data['total_cost'] - cost_of_sold)
-                                data['total_shares'] = max(0, data['total_shares'] - shares)
+                    data = ticker_cost_basis[ticker]
+                    data['last_price'] = price
+
+                    if action == 'BUY':
+                        data['total_cost'] += shares * price
+                        data['total_shares'] += shares
+                    elif action == 'SELL':
+                        # Расчет realized PnL (FIFO метод)
+                        if data['total_shares'] > 0:
+                            avg_cost = data['total_cost'] / data['total_shares']
+                            sell_revenue = shares * price
+                            cost_of_sold = shares * avg_cost
+                            realized_pnl += sell_revenue - cost_of_sold
+
+                            # Обновить cost basis
+                            data['total_cost'] = max(0, data['total_cost'] - cost_of_sold)
+                            data['total_shares'] = max(0, data['total_shares'] - shares)
 
             # Рассчитать positions_value и unrealized_pnl
             for ticker, current_shares in positions.items():
@@ -558,6 +724,10 @@ class InvestorManager:
                         avg_cost = data['total_cost'] / data['total_shares']
                         unrealized_pnl += (current_price - avg_cost) * current_shares
 
+            self._store_positions_cached(
+                cache_key, stamp, (positions_value, realized_pnl, unrealized_pnl)
+            )
+
         except Exception as exc:
             logging.error(
                 "Error calculating positions for %s:%s - %s",
@@ -710,6 +880,17 @@ class InvestorManager:
                 'total_value': 0.0
             }
 
+        # Баланс зависит только от operations.csv и trades.csv
+        investor_path = self._get_investor_path(name)
+        stamps = (
+            self._file_stamp(investor_path / 'operations.csv'),
+            self._file_stamp(investor_path / 'trades.csv'),
+        )
+        with self._cache_lock:
+            cached = self._balance_cache.get(name)
+        if cached is not None and cached[0] == stamps:
+            return copy.deepcopy(cached[1])
+
         balance = {
             'low': {
                 'cash': 0.0,
@@ -745,6 +926,9 @@ class InvestorManager:
             balance[account]['total_value'] = cash + positions_value
             balance['total_value'] += balance[account]['total_value']
 
+        snapshot = copy.deepcopy(balance)
+        with self._cache_lock:
+            self._balance_cache[name] = (stamps, snapshot)
         return balance
 
     def get_all_balances(self) -> Dict:
@@ -795,24 +979,26 @@ class InvestorManager:
             )
             return
 
-        # Распределить по инвесторам пропорционально
-        for investor_name in self._active_investors():
-            investor_capital = account_allocations.get(investor_name, 0.0)
-
-            if investor_capital <= 0:
-                continue
-
-            # Рассчитать долю инвестора
-            share = investor_capital / total_capital
-            investor_shares = total_shares * share
+        # Распределить по инвесторам пропорционально (доли считаются одним вектором)
+        investors = [
+            investor_name for investor_name in self._active_investors()
+            if account_allocations.get(investor_name, 0.0) > 0
+        ]
+        capital = np.fromiter(
+            (account_allocations[investor_name] for investor_name in investors),
+            dtype=float,
+            count=len(investors),
+        )
+        investor_shares = total_shares * (capital / total_capital)
 
-            # Записать сделку
+        # Записать сделки
+        for investor_name, shares in zip(investors, investor_shares.tolist()):
             self._record_trade(
                 investor_name,
                 account,
                 action,
                 ticker,
-                investor_shares,
+                shares,
                 price
             )
 
@@ -841,10 +1027,7 @@ class InvestorManager:
                 writer = csv.writer(f)
 
                 if not file_exists:
-                    writer.writerow([
-                        'date', 'timestamp', 'account', 'action', 'ticker',
-                        'shares', 'price', 'amount', 'total_shares_after', 'notes'
-                    ])
+                    writer.writerow(TRADES_HEADER)
 
                 writer.writerow([
                     timestamp.strftime('%Y-%m-%d'),
@@ -853,8 +1036,8 @@ class InvestorManager:
                     action,
                     ticker,
                     f"{shares:.4f}",
-                    f"{price:.2f}",
-                    f"{amount:.2f}",
+                    str(_to_cents(price)),
+                    str(_to_cents(amount)),
                     f"{total_shares_after:.4f}",
                     f"Rebalance - {action} {shares:.4f} shares @ ${price:.2f}"
                 ])
@@ -882,11 +1065,10 @@ class InvestorManager:
         total_shares = 0.0
 
         try:
-            with open(trades_file, 'r', encoding='utf-8') as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    if row['account'] == account and row['ticker'] == ticker:
-                        total_shares = float(row['total_shares_after'])
+            _, rows = self._read_csv(trades_file)
+            for row in rows:
+                if row[TRADES_COL_ACCOUNT] == account and row[TRADES_COL_TICKER] == ticker:
+                    total_shares = float(row[TRADES_COL_TOTAL_SHARES_AFTER])
 
         except Exception as exc:
             logging.error(
@@ -966,31 +1148,30 @@ class InvestorManager:
 
             if operations_file.exists():
                 try:
-                    with open(operations_file, 'r', encoding='utf-8') as f:
-                        reader = csv.DictReader(f)
-                        for row in reader:
-                            if row.get('status') != 'completed':
+                    _, rows = self._read_csv(operations_file)
+                    for row in rows:
+                        if row[OPS_COL_STATUS] != 'completed':
+                            continue
+
+                        try:
+                            op_date = datetime.strptime(
+                                row[OPS_COL_DATE], '%Y-%m-%d'
+                            ).date()
+                            if op_date > snapshot_date:
                                 continue
 
-                            try:
-                                op_date = datetime.strptime(
-                                    row['date'], '%Y-%m-%d'
-                                ).date()
-                                if op_date > snapshot_date:
-                                    continue
+                            amount = float(row[OPS_COL_AMOUNT])
+                        except (ValueError, KeyError):
+                            continue
 
-                                amount = float(row['amount'])
-                            except (ValueError, KeyError):
-                                continue
-
-                            account = row.get('account')
-                            if not account:
-                                continue
+                        account = row[OPS_COL_ACCOUNT]
+                        if not account:
+                            continue
 
-                            if row.get('operation') == 'deposit':
-                                cumulative_deposits[account] += amount
-                            elif row.get('operation') in ('withdraw', 'fee'):
-                                cumulative_withdrawals[account] += amount
+                        if row[OPS_COL_OPERATION] == 'deposit':
+                            cumulative_deposits[account] += amount
+                        elif row[OPS_COL_OPERATION] in ('withdraw', 'fee'):
+                            cumulative_withdrawals[account] += amount
 
                 except Exception as exc:
                     logging.error(
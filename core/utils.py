@@ -1,53 +1,180 @@
 """Utilities and helper functions."""
 import asyncio
 import logging
+import random
+import threading
 import time
-from functools import wraps
-from typing import Callable, TypeVar, Any, Dict, Coroutine
+import weakref
+from functools import lru_cache, wraps
+from operator import attrgetter
+from typing import Callable, TypeVar, Any, Dict, Coroutine, Iterable, List, Tuple, Type
 
+import numpy as np
 from aiogram.exceptions import TelegramNetworkError, TelegramRetryAfter
+from alpaca.common.exceptions import APIError
 
 T = TypeVar('T')
 
+logger = logging.getLogger(__name__)
 
+# Reads (symbol, qty) from a position in one C-level call
+_position_symbol_qty = attrgetter('symbol', 'qty')
+
+# get_positions results are reused for this long (seconds) per trading client,
+# so back-to-back callers share one REST round trip
+_POSITIONS_TTL = 1.0
+_positions_cache: 'weakref.WeakKeyDictionary[Any, Tuple[float, Dict[str, float]]]' = (
+    weakref.WeakKeyDictionary()
+)
+_positions_lock = threading.Lock()
+# One fetch lock per client: concurrent cache misses wait for the caller that
+# is already fetching and reuse its result instead of each hitting the API
+_positions_fetch_locks: 'weakref.WeakKeyDictionary[Any, threading.Lock]' = (
+    weakref.WeakKeyDictionary()
+)
+
+# After this many consecutive failed get_positions calls for a client, further
+# calls fail fast for the cooldown (seconds). Once it has passed, one caller is
+# let through as a probe (half-open) while the others keep failing fast
+_BREAKER_THRESHOLD = 5
+_BREAKER_COOLDOWN = 30.0
+_breaker_state: 'weakref.WeakKeyDictionary[Any, List[float]]' = weakref.WeakKeyDictionary()
+_breaker_lock = threading.Lock()
+
+# Failures worth retrying by default: network-level errors (ConnectionError,
+# TimeoutError and requests' connection errors are all OSError subclasses)
+TRANSIENT_ERRORS: Tuple[Type[BaseException], ...] = (OSError,)
+
+# Private generator for retry jitter, kept apart from the global random state
+_retry_random = random.Random()
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised when get_positions fails fast because the broker keeps failing."""
+
+
+# Decorations with identical arguments share one decorator object; all
+# arguments are hashable (retry_on must be a tuple)
+@lru_cache(maxsize=None)
 def retry_on_exception(
     retries: int = 3,
-    delay: int = 1
+    delay: float = 1,
+    backoff: float = 2.0,
+    jitter: bool = True,
+    cap: float = 30.0,
+    deadline: float | None = None,
+    retry_on: Tuple[Type[BaseException], ...] = TRANSIENT_ERRORS
 ) -> Callable[[Callable[..., T]], Callable[..., T]]:
     """Decorator for retrying function execution on exception.
 
+    Waits grow exponentially (delay * backoff ** n, at most cap) and are
+    randomly scaled by 0.5-1.5 when jitter is on, so clients hitting the
+    same outage do not retry in lockstep. With a deadline, no retry is
+    scheduled that would end past the total time budget; coroutine attempts
+    are also cancelled once it runs out. Coroutine functions are retried
+    with asyncio.sleep, never blocking the event loop.
+    Exceptions outside retry_on propagate on the first attempt.
+
     Args:
         retries: Number of execution attempts
-        delay: Delay between attempts in seconds
+        delay: Delay before the first retry in seconds
+        backoff: Multiplier applied to the delay after each failed attempt
+        jitter: Randomize each wait by a factor in [0.5, 1.5]
+        cap: Upper bound for a single wait in seconds
+        deadline: Total time budget in seconds for all attempts (None - unbounded)
+        retry_on: Exception types treated as transient and retried
 
     Returns:
         Decorated function with retry mechanism
     """
     def decorator(func: Callable[..., T]) -> Callable[..., T]:
+        # Every attempt but the last retries; the last one runs outside the
+        # loop, so the success path carries no per-attempt bookkeeping
+        retried_attempts = range(1, retries)
+
+        def next_wait(attempt: int, started: float, exc: BaseException) -> float | None:
+            """Return the wait before the next attempt, None if past the deadline."""
+            wait = min(cap, delay * backoff ** (attempt - 1))
+            if jitter:
+                wait *= _retry_random.uniform(0.5, 1.5)
+            if deadline is not None and time.monotonic() - started + wait > deadline:
+                logger.error(
+                    "Retry deadline of %.1fs reached for %s after %d attempt(s): %s",
+                    deadline,
+                    func.__name__,
+                    attempt,
+                    exc,
+                    exc_info=True
+                )
+                return None
+            if logger.isEnabledFor(logging.WARNING):
+                # Message args are formatted only if a handler emits the record;
+                # err_type lets structured handlers group failures cheaply
+                logger.warning(
+                    "Attempt %d/%d failed for %s: %s - retrying in %.2fs",
+                    attempt,
+                    retries,
+                    func.__name__,
+                    exc,
+                    wait,
+                    exc_info=exc if logger.isEnabledFor(logging.DEBUG) else None,
+                    extra={'err_type': type(exc).__name__}
+                )
+            return wait
+
+        def log_final_error(exc: BaseException) -> None:
+            logger.error(
+                "All %d attempts failed for %s (final error): %s",
+                retries,
+                func.__name__,
+                exc,
+                exc_info=True,
+                extra={'err_type': type(exc).__name__}
+            )
+
+        if asyncio.iscoroutinefunction(func):
+            # Coroutines wait with asyncio.sleep so the event loop keeps running
+            async def bounded_call(started: float, args: Any, kwargs: Any) -> T:
+                """Await func; with a deadline, cancel it once the budget runs out."""
+                if deadline is None:
+                    return await func(*args, **kwargs)
+                remaining = max(0.0, deadline - (time.monotonic() - started))
+                return await asyncio.wait_for(func(*args, **kwargs), timeout=remaining)
+
+            @wraps(func)
+            async def async_wrapper(*args: Any, **kwargs: Any) -> T:
+                started = time.monotonic() if deadline is not None else 0.0
+                for attempt in retried_attempts:
+                    try:
+                        return await bounded_call(started, args, kwargs)
+                    except retry_on as exc:
+                        wait = next_wait(attempt, started, exc)
+                        if wait is None:
+                            raise
+                        await asyncio.sleep(wait)
+                try:
+                    return await bounded_call(started, args, kwargs)
+                except retry_on as exc:
+                    log_final_error(exc)
+                    raise
+            return async_wrapper  # type: ignore[return-value]
+
         @wraps(func)
         def wrapper(*args: Any, **kwargs: Any) -> T:
-            for attempt in range(1, retries + 1):
+            started = time.monotonic() if deadline is not None else 0.0
+            for attempt in retried_attempts:
                 try:
                     return func(*args, **kwargs)
-                except Exception as exc:  # pylint: disable=broad-exception-caught
-                    if attempt == retries:
-                        logging.error(
-                            "All %d attempts failed for %s (final error): %s",
-                            retries,
-                            func.__name__,
-                            exc,
-                            exc_info=True
-                        )
+                except retry_on as exc:
+                    wait = next_wait(attempt, started, exc)
+                    if wait is None:
                         raise
-                    logging.warning(
-                        "Attempt %d/%d failed for %s: %s",
-                        attempt,
-                        retries,
-                        func.__name__,
-                        exc
-                    )
-                    time.sleep(delay)
-            raise RuntimeError("Unexpected: retry loop completed without returning or raising")
+                    time.sleep(wait)
+            try:
+                return func(*args, **kwargs)
+            except retry_on as exc:
+                log_final_error(exc)
+                raise
         return wrapper
     return decorator
 
@@ -78,7 +205,7 @@ def retry_on_telegram_error(
                 except TelegramRetryAfter as exc:
                     # Respect Telegram's rate limit
                     retry_after = exc.retry_after
-                    logging.warning(
+                    logger.warning(
                         "Rate limited in %s, waiting %d seconds (attempt %d/%d)",
                         func.__name__,
                         retry_after,
@@ -86,7 +213,7 @@ def retry_on_telegram_error(
                         retries
                     )
                     if attempt == retries:
-                        logging.error(
+                        logger.error(
                             "All %d attempts failed for %s due to rate limiting",
                             retries,
                             func.__name__
@@ -96,7 +223,7 @@ def retry_on_telegram_error(
                 except TelegramNetworkError as exc:
                     # Handle network errors with exponential backoff
                     if attempt == retries:
-                        logging.error(
+                        logger.error(
                             "All %d attempts failed for %s (final network error): %s",
                             retries,
                             func.__name__,
@@ -104,7 +231,7 @@ def retry_on_telegram_error(
                             exc_info=True
                         )
                         raise
-                    logging.warning(
+                    logger.warning(
                         "Network error in %s (attempt %d/%d): %s - retrying in %.1fs",
                         func.__name__,
                         attempt,
@@ -119,18 +246,139 @@ def retry_on_telegram_error(
     return decorator
 
 
-@retry_on_exception()
+@retry_on_exception(retry_on=(APIError,) + TRANSIENT_ERRORS)
+def _fetch_positions(trading_client) -> Dict[str, float]:
+    """Fetch positions from the broker as {ticker: quantity}."""
+    positions = trading_client.get_all_positions()
+    if not positions:
+        return {}
+    symbols, qtys = zip(*map(_position_symbol_qty, positions))
+    # One batched float64 conversion instead of float() per position
+    return dict(zip(symbols, np.asarray(qtys, dtype=np.float64).tolist()))
+
+
 def get_positions(trading_client) -> Dict[str, float]:
     """Get current trading positions.
 
+    Results are cached per client for _POSITIONS_TTL seconds, and concurrent
+    cache misses share a single broker request; call
+    invalidate_positions_cache after placing or closing orders. After
+    _BREAKER_THRESHOLD failed calls in a row, calls raise CircuitOpenError
+    without touching the API until _BREAKER_COOLDOWN seconds have passed;
+    then a single probe call reaches the broker.
+
     Args:
         trading_client: Alpaca trading client
 
     Returns:
         Dict[str, float]: Dictionary of positions {ticker: quantity}
+
+    Raises:
+        CircuitOpenError: The broker failed repeatedly and the cooldown is running
     """
-    positions = trading_client.get_all_positions()
-    return {pos.symbol: float(pos.qty) for pos in positions}
+    now = time.monotonic()
+    with _positions_lock:
+        cached = _positions_cache.get(trading_client)
+    if cached is not None and now - cached[0] < _POSITIONS_TTL:
+        return dict(cached[1])
+
+    with _breaker_lock:
+        state = _breaker_state.get(trading_client)
+        if state is not None and state[0] >= _BREAKER_THRESHOLD:
+            if now - state[1] < _BREAKER_COOLDOWN:
+                raise CircuitOpenError(
+                    f"get_positions disabled for {_BREAKER_COOLDOWN:.0f}s after "
+                    f"{int(state[0])} consecutive failures"
+                )
+            # Half-open: restart the cooldown so concurrent callers keep
+            # failing fast while this call probes the broker
+            state[1] = now
+
+    with _positions_lock:
+        fetch_lock = _positions_fetch_locks.setdefault(trading_client, threading.Lock())
+    with fetch_lock:
+        # Another caller may have refreshed the cache while this one waited
+        with _positions_lock:
+            cached = _positions_cache.get(trading_client)
+        if cached is not None and time.monotonic() - cached[0] < _POSITIONS_TTL:
+            return dict(cached[1])
+
+        try:
+            positions = _fetch_positions(trading_client)
+        except Exception:
+            with _breaker_lock:
+                state = _breaker_state.setdefault(trading_client, [0, 0.0])
+                state[0] += 1
+                state[1] = time.monotonic()
+            raise
+        with _breaker_lock:
+            _breaker_state.pop(trading_client, None)
+        # The TTL counts from when the data arrived, not from when the call started
+        with _positions_lock:
+            _positions_cache[trading_client] = (time.monotonic(), positions)
+    return dict(positions)
+
+
+def invalidate_positions_cache(trading_client) -> None:
+    """Drop cached positions for a trading client.
+
+    Args:
+        trading_client: Alpaca trading client whose positions changed
+    """
+    with _positions_lock:
+        _positions_cache.pop(trading_client, None)
+
+
+def wait_for_closures(trading_client, tickers: Iterable[str], timeout: float,
+                      poll_interval: float = 0.2) -> None:
+    """Wait until closed tickers disappear from broker positions.
+
+    Polls get_all_positions instead of sleeping a fixed interval, so the
+    open phase starts as soon as the broker reports the closures.
+
+    Args:
+        trading_client: Alpaca trading client the closures were sent to
+        tickers: Tickers that were sent for closing
+        timeout: Maximum time to wait in seconds
+        poll_interval: Delay between polls in seconds
+    """
+    pending = set(tickers)
+    deadline = time.monotonic() + timeout
+    while pending:
+        try:
+            held = {pos.symbol for pos in trading_client.get_all_positions()}
+            pending &= held
+        except Exception as exc:  # pylint: disable=broad-exception-caught
+            logger.warning("Failed to poll positions after closing: %s", exc)
+        if not pending:
+            return
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            logger.warning(
+                "Positions still open after %.1fs: %s",
+                timeout,
+                sorted(pending)
+            )
+            return
+        time.sleep(min(poll_interval, remaining))
+
+
+def diff_tickers(
+    current: Iterable[str],
+    target: Iterable[str]
+) -> Tuple[List[str], List[str]]:
+    """Split tickers into positions to close and positions to open.
+
+    Args:
+        current: Tickers currently held
+        target: Tickers the strategy wants to hold
+
+    Returns:
+        Tuple[List[str], List[str]]: (to_close, to_open)
+    """
+    current_set = set(current)
+    target_set = set(target)
+    return list(current_set - target_set), list(target_set - current_set)
 
 
 def run_sync(
@@ -165,17 +413,23 @@ def telegram_handler(error_message: str = "❌ An error occurred"):
             try:
                 return await func(message, *args, **kwargs)
             except Exception as exc:  # pylint: disable=broad-exception-caught
-                user_id = (
-                    getattr(message, 'from_user', {}).id
-                    if hasattr(message, 'from_user') else 'unknown'
-                )
-                logging.error(
+                # from_user may be missing or None (e.g. channel posts)
+                user_id = getattr(getattr(message, 'from_user', None), 'id', 'unknown')
+                logger.error(
                     "Error in Telegram command %s (user %s): %s",
                     func.__name__,
                     user_id,
                     exc,
                     exc_info=True
                 )
-                await message.answer(error_message)
+                # Replying can fail too (network, bot blocked); never let it escape
+                try:
+                    await message.answer(error_message)
+                except Exception:  # pylint: disable=broad-exception-caught
+                    logger.exception(
+                        "Failed to send error reply for %s to user %s",
+                        func.__name__,
+                        user_id
+                    )
         return wrapper
     return decorator
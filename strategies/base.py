@@ -1,7 +1,7 @@
 """Base momentum strategy class."""
 import logging
-import time
-from typing import List, Tuple, cast
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Tuple, cast
 
 import pandas as pd
 from alpaca.common.exceptions import APIError
@@ -11,8 +11,17 @@ from alpaca.trading.client import TradingClient
 from alpaca.trading.enums import OrderSide, OrderType, TimeInForce
 from alpaca.trading.requests import MarketOrderRequest
 
-from core.data_loader import load_market_data
-from core.utils import retry_on_exception
+from config import ORDER_SUBMIT_MAX_WORKERS, REBALANCE_DRIFT_TOLERANCE
+from core.data_loader import get_close_prices, load_market_data
+from core.utils import (
+    diff_tickers, get_positions, invalidate_positions_cache, retry_on_exception,
+    wait_for_closures,
+)
+
+logger = logging.getLogger(__name__)
+
+# Fixed fields shared by every market order the strategies place
+MARKET_DAY_ORDER_KWARGS = {'type': OrderType.MARKET, 'time_in_force': TimeInForce.DAY}
 
 
 class BaseMomentumStrategy:
@@ -77,7 +86,7 @@ class BaseMomentumStrategy:
                     if price > 0:
                         prices[symbol] = price
         except Exception as exc:  # pylint: disable=broad-exception-caught
-            logging.warning(
+            logger.warning(
                 "Failed bulk latest price lookup for %d tickers: %s",
                 len(tickers),
                 exc
@@ -96,41 +105,66 @@ class BaseMomentumStrategy:
                     if price > 0:
                         prices[symbol] = price
             except Exception as exc:  # pylint: disable=broad-exception-caught
-                logging.warning("Failed price lookup for %s: %s", symbol, exc)
+                logger.warning("Failed price lookup for %s: %s", symbol, exc)
 
         return prices
 
-    def _filter_tradable_tickers(self, tickers: List[str]) -> List[str]:
-        """Отфильтровать тикеры, доступные к торговле (active + tradable)."""
+    def _fetch_assets(self, tickers: List[str]) -> Dict[str, Any]:
+        """Fetch asset profiles for tickers concurrently.
+
+        Args:
+            tickers: Tickers to look up
+
+        Returns:
+            Dict[str, Any]: Asset per ticker, None where the lookup failed
+        """
+        assets: Dict[str, Any] = {}
+
+        def fetch(ticker: str) -> None:
+            assets[ticker] = self.trading_client.get_asset(ticker)
+
+        errors = self._call_concurrently(fetch, tickers)
+        for ticker, exc in zip(tickers, errors):
+            if exc is not None:
+                logger.warning("Failed to fetch asset profile for %s: %s", ticker, exc)
+                assets[ticker] = None
+        return assets
+
+    def _filter_tradable_tickers(self, tickers: List[str],
+                                 assets: Dict[str, Any] | None = None) -> List[str]:
+        """Отфильтровать тикеры, доступные к торговле (active + tradable).
+
+        Args:
+            tickers: Тикеры для проверки
+            assets: Уже загруженные профили активов; если не переданы, загружаются
+        """
+        if assets is None:
+            assets = self._fetch_assets(tickers)
         tradable: List[str] = []
         skipped: List[Tuple[str, str]] = []
 
         for ticker in tickers:
-            try:
-                asset = self.trading_client.get_asset(ticker)
-                raw_status = getattr(asset, 'status', 'active')
-                status = raw_status.lower() if isinstance(raw_status, str) else 'active'
-                raw_tradable = getattr(asset, 'tradable', True)
-                tradable_flag = bool(raw_tradable)
+            asset = assets.get(ticker)
+            if asset is None:
+                skipped.append((ticker, 'lookup_failed'))
+                continue
 
-                if not tradable_flag:
-                    skipped.append((ticker, 'not_tradable'))
-                    continue
+            raw_status = getattr(asset, 'status', 'active')
+            status = raw_status.lower() if isinstance(raw_status, str) else 'active'
+            tradable_flag = bool(getattr(asset, 'tradable', True))
 
-                if status != 'active':
-                    skipped.append((ticker, status or 'inactive'))
-                    continue
+            if not tradable_flag:
+                skipped.append((ticker, 'not_tradable'))
+                continue
 
-                tradable.append(ticker)
-            except Exception as exc:  # pylint: disable=broad-exception-caught
-                logging.warning(
-                    "Skip %s: failed to fetch asset status (%s)",
-                    ticker, exc
-                )
-                skipped.append((ticker, 'lookup_failed'))
+            if status != 'active':
+                skipped.append((ticker, status or 'inactive'))
+                continue
+
+            tradable.append(ticker)
 
         if skipped:
-            logging.warning(
+            logger.warning(
                 "Skipping %d non-tradable assets: %s",
                 len(skipped),
                 [(t, s) for t, s in skipped]
@@ -138,6 +172,17 @@ class BaseMomentumStrategy:
 
         return tradable
 
+    def _wait_for_closures(self, tickers: List[str], timeout: float = 5.0,
+                           poll_interval: float = 0.2) -> None:
+        """Wait until closed tickers disappear from broker positions.
+
+        Args:
+            tickers: Tickers that were sent for closing
+            timeout: Maximum time to wait in seconds
+            poll_interval: Delay between polls in seconds
+        """
+        wait_for_closures(self.trading_client, tickers, timeout, poll_interval)
+
     @retry_on_exception()
     def get_signals(self) -> List[str]:
         """Get trading signals - top N stocks by momentum from self.tickers only.
@@ -154,7 +199,7 @@ class BaseMomentumStrategy:
 
         data = cast(pd.DataFrame, data)  # type: ignore[assignment]
         # Calculate momentum for all tickers: (last_price / first_price - 1)
-        close_prices = data.xs('Close', level=0, axis=1)  # type: ignore[attr-defined]
+        close_prices = get_close_prices(data)
         momentum = close_prices.iloc[-1] / close_prices.iloc[0] - 1  # type: ignore[attr-defined]
 
         # Cast to Series for type safety
@@ -174,26 +219,96 @@ class BaseMomentumStrategy:
             positions: List of tickers to close
         """
         failed_closures = []
-        for ticker in positions:
-            try:
-                self.trading_client.close_position(ticker)
-                logging.info("Position %s closed", ticker)
-            except Exception as exc:  # pylint: disable=broad-exception-caught
-                logging.error(
-                    "Error closing position %s: %s",
-                    ticker,
-                    exc,
-                    exc_info=True
-                )
-                failed_closures.append((ticker, str(exc)))
+        results = self._call_concurrently(self.trading_client.close_position, positions)
+        for ticker, exc in zip(positions, results):
+            if exc is None:
+                logger.info("Position %s closed", ticker)
+                continue
+            logger.error(
+                "Error closing position %s: %s",
+                ticker,
+                exc,
+                exc_info=exc if logger.isEnabledFor(logging.DEBUG) else None
+            )
+            failed_closures.append((ticker, str(exc)))
 
         if failed_closures:
-            logging.warning(
+            logger.warning(
                 "Failed to close %d position(s): %s",
                 len(failed_closures),
                 [(t, e.split('\n')[0]) for t, e in failed_closures]
             )
 
+    def _close_all_positions(self, positions: List[str]) -> None:
+        """Liquidate the whole account in one request.
+
+        Falls back to per-ticker close_positions if the bulk call fails.
+
+        Args:
+            positions: Tickers currently held (used for the fallback)
+        """
+        try:
+            responses = self.trading_client.close_all_positions(cancel_orders=True)
+        except Exception as exc:  # pylint: disable=broad-exception-caught
+            logger.warning("Bulk close failed, closing positions one by one: %s", exc)
+            self.close_positions(positions)
+            return
+
+        failed_closures = []
+        for resp in responses:
+            # Raw-data clients return dicts; status is Optional[int] either way
+            if isinstance(resp, dict):
+                symbol, status, body = resp.get('symbol'), resp.get('status'), resp.get('body')
+            else:
+                symbol, status, body = resp.symbol, resp.status, resp.body
+            if (status or 200) >= 300:
+                failed_closures.append((symbol, str(body)))
+        logger.info("Closed all %d position(s) in one request", len(positions) - len(failed_closures))
+        if failed_closures:
+            logger.warning(
+                "Failed to close %d position(s): %s",
+                len(failed_closures),
+                [(t, e.split('\n')[0]) for t, e in failed_closures]
+            )
+
+    def _call_concurrently(self, call, items: List) -> List[Exception | None]:
+        """Run a blocking per-item API call over a small thread pool.
+
+        Each Alpaca call is a blocking HTTP request, so fanning them out
+        keeps total time close to a single RTT.
+
+        Args:
+            call: Callable taking one item (e.g. submit_order, close_position)
+            items: Items to pass to call
+
+        Returns:
+            List[Exception | None]: Per-item error (None on success), same order as input
+        """
+        def run(item) -> Exception | None:
+            try:
+                call(item)
+                return None
+            except Exception as exc:  # pylint: disable=broad-exception-caught
+                return exc
+
+        if len(items) <= 1:
+            return [run(item) for item in items]
+
+        workers = min(ORDER_SUBMIT_MAX_WORKERS, len(items))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(run, items))
+
+    def _submit_orders(self, orders: List[MarketOrderRequest]) -> List[Exception | None]:
+        """Submit orders concurrently.
+
+        Args:
+            orders: Prepared order requests
+
+        Returns:
+            List[Exception | None]: Per-order error (None on success), same order as input
+        """
+        return self._call_concurrently(self.trading_client.submit_order, orders)
+
     def open_positions(self, tickers: List[str],
                        cash_per_position: float) -> None:
         """Open new positions.
@@ -203,25 +318,23 @@ class BaseMomentumStrategy:
             cash_per_position: Position size in dollars
         """
         price_lookup = self._preload_last_prices(tickers)
+        # Fixed order fields are built once per call, not per ticker
+        notional = round(cash_per_position, 2)
+        buy_kwargs = {**MARKET_DAY_ORDER_KWARGS, 'side': OrderSide.BUY}
         failed_opens = []
+        prepared: List[Tuple[str, MarketOrderRequest, bool]] = []
         for ticker in tickers:
             try:
                 asset = self.trading_client.get_asset(ticker)
                 fractionable_flag = bool(getattr(asset, 'fractionable', True))
 
                 if fractionable_flag:
-                    order = MarketOrderRequest(
-                        symbol=ticker,
-                        notional=round(cash_per_position, 2),
-                        side=OrderSide.BUY,
-                        type=OrderType.MARKET,
-                        time_in_force=TimeInForce.DAY
-                    )
+                    order = MarketOrderRequest(symbol=ticker, notional=notional, **buy_kwargs)
                 else:
                     price = price_lookup.get(ticker, 0.0)
                     qty = int(cash_per_position // price) if price > 0 else 0
                     if price <= 0 or qty <= 0:
-                        logging.warning(
+                        logger.warning(
                             "Skipping %s: cannot place whole-share order (price=%.2f, cash=%.2f)",
                             ticker,
                             price,
@@ -230,47 +343,45 @@ class BaseMomentumStrategy:
                         failed_opens.append((ticker, "no_qty_for_whole_share"))
                         continue
 
-                    order = MarketOrderRequest(
-                        symbol=ticker,
-                        qty=qty,
-                        side=OrderSide.BUY,
-                        type=OrderType.MARKET,
-                        time_in_force=TimeInForce.DAY
-                    )
-                self.trading_client.submit_order(order)
-                logging.info(
-                    "Opened position %s using %s (cash target $%.2f, price %.2f)",
-                    ticker,
-                    "notional" if fractionable_flag else f"qty={order.qty}",  # type: ignore[attr-defined]
-                    cash_per_position,
-                    price_lookup.get(ticker, 0.0)
-                )
-            except APIError as exc:
-                if self._is_pdt_error(exc):
-                    logging.warning(
-                        "Order for %s blocked by PDT protection; skipping ticker",
-                        ticker
-                    )
-                    failed_opens.append((ticker, "PDT protection"))
-                    continue
-                logging.error(
+                    order = MarketOrderRequest(symbol=ticker, qty=qty, **buy_kwargs)
+                prepared.append((ticker, order, fractionable_flag))
+            except Exception as exc:  # pylint: disable=broad-exception-caught
+                logger.error(
                     "Error opening position %s: %s",
                     ticker,
                     exc,
-                    exc_info=True
+                    exc_info=logger.isEnabledFor(logging.DEBUG)
                 )
                 failed_opens.append((ticker, str(exc)))
-            except Exception as exc:  # pylint: disable=broad-exception-caught
-                logging.error(
-                    "Error opening position %s: %s",
+
+        results = self._submit_orders([order for _, order, _ in prepared])
+        for (ticker, order, fractionable_flag), exc in zip(prepared, results):
+            if exc is None:
+                logger.info(
+                    "Opened position %s using %s (cash target $%.2f, price %.2f)",
                     ticker,
-                    exc,
-                    exc_info=True
+                    "notional" if fractionable_flag else f"qty={order.qty}",  # type: ignore[attr-defined]
+                    cash_per_position,
+                    price_lookup.get(ticker, 0.0)
                 )
-                failed_opens.append((ticker, str(exc)))
+                continue
+            if isinstance(exc, APIError) and self._is_pdt_error(exc):
+                logger.warning(
+                    "Order for %s blocked by PDT protection; skipping ticker",
+                    ticker
+                )
+                failed_opens.append((ticker, "PDT protection"))
+                continue
+            logger.error(
+                "Error opening position %s: %s",
+                ticker,
+                exc,
+                exc_info=exc if logger.isEnabledFor(logging.DEBUG) else None
+            )
+            failed_opens.append((ticker, str(exc)))
 
         if failed_opens:
-            logging.warning(
+            logger.warning(
                 "Failed to open %d position(s): %s",
                 len(failed_opens),
                 [(t, e.split('\n')[0]) for t, e in failed_opens]
@@ -279,50 +390,42 @@ class BaseMomentumStrategy:
     def rebalance(self) -> None:
         """Rebalance portfolio."""
         try:
-            logging.info("Starting portfolio rebalancing")
+            logger.info("Starting portfolio rebalancing")
 
             # Get trading strategy signals
             top_tickers = self.get_signals()
-            logging.info("Top %d stocks by momentum: %s", self.top_count, ', '.join(top_tickers))
+            logger.info("Top %d stocks by momentum: %s", self.top_count, ', '.join(top_tickers))
             if not top_tickers:
-                logging.warning("No tickers returned for strategy, skipping rebalance")
+                logger.warning("No tickers returned for strategy, skipping rebalance")
                 return
 
-            top_tickers = self._filter_tradable_tickers(top_tickers)
+            # One concurrent lookup serves both the tradability filter and sizing
+            asset_cache = self._fetch_assets(top_tickers)
+            top_tickers = self._filter_tradable_tickers(top_tickers, asset_cache)
             if not top_tickers:
-                logging.warning("No tradable tickers after filtering, stopping rebalance")
+                logger.warning("No tradable tickers after filtering, stopping rebalance")
                 return
             price_lookup = self._preload_last_prices(top_tickers)
-            asset_cache = {}
-            for ticker in top_tickers:
-                try:
-                    asset_cache[ticker] = self.trading_client.get_asset(ticker)
-                except Exception as exc:  # pylint: disable=broad-exception-caught
-                    logging.warning("Failed to fetch asset profile for %s: %s", ticker, exc)
-                    asset_cache[ticker] = None
-
-            # Get current positions
-            positions_raw = self.trading_client.get_all_positions()
-            current_positions = {
-                pos.symbol: float(pos.qty)
-                for pos in positions_raw
-            }
-            logging.info("Current positions: %s", current_positions)
 
-            # Determine positions to close and open
-            top_tickers_set = set(top_tickers)
-            current_positions_set = set(current_positions)
+            # Get current positions (quantities converted in one numpy batch)
+            current_positions = get_positions(self.trading_client)
+            logger.info("Current positions: %s", current_positions)
 
-            positions_to_close = list(current_positions_set - top_tickers_set)
-            positions_to_open = list(top_tickers_set - current_positions_set)
+            # Determine positions to close and open
+            positions_to_close, positions_to_open = diff_tickers(current_positions, top_tickers)
 
-            logging.info("Positions to close: %s", positions_to_close)
-            logging.info("Positions to open: %s", positions_to_open)
+            logger.info("Positions to close: %s", positions_to_close)
+            logger.info("Positions to open: %s", positions_to_open)
 
             # Close unneeded positions
             if positions_to_close:
-                self.close_positions(positions_to_close)
-                time.sleep(5)
+                # Full exit: one bulk request instead of a call per ticker
+                if len(positions_to_close) == len(current_positions):
+                    self._close_all_positions(positions_to_close)
+                else:
+                    self.close_positions(positions_to_close)
+                invalidate_positions_cache(self.trading_client)
+                self._wait_for_closures(positions_to_close, timeout=5.0)
 
             # Refresh current positions after closing
             refreshed_positions = {
@@ -339,16 +442,18 @@ class BaseMomentumStrategy:
                 )
             )
             if portfolio_value <= 0:
-                logging.warning("Portfolio value not available for rebalancing")
+                logger.warning("Portfolio value not available for rebalancing")
                 return
 
             target_value = portfolio_value / len(top_tickers)
             if target_value <= 0:
-                logging.warning("Target value per ticker is non-positive")
+                logger.warning("Target value per ticker is non-positive")
                 return
 
-            tolerance = 1.0  # Skip tiny adjustments
+            # Skip tiny adjustments: below $1 or within the drift band of target
+            tolerance = max(1.0, target_value * REBALANCE_DRIFT_TOLERANCE)
             failed_adjustments = []
+            adjustments: List[Tuple[str, OrderSide, MarketOrderRequest, bool, float]] = []
             for ticker in top_tickers:
                 asset = asset_cache.get(ticker)
                 fractionable_flag = bool(getattr(asset, 'fractionable', True)) if asset else True
@@ -369,12 +474,11 @@ class BaseMomentumStrategy:
                         symbol=ticker,
                         notional=round(abs(difference), 2),
                         side=side,
-                        type=OrderType.MARKET,
-                        time_in_force=TimeInForce.DAY
+                        **MARKET_DAY_ORDER_KWARGS
                     )
                 else:
                     if price <= 0:
-                        logging.warning(
+                        logger.warning(
                             "Skip %s: missing price for whole-share adjustment",
                             ticker
                         )
@@ -391,12 +495,23 @@ class BaseMomentumStrategy:
                         symbol=ticker,
                         qty=int(abs(delta_shares)),
                         side=side,
-                        type=OrderType.MARKET,
-                        time_in_force=TimeInForce.DAY
+                        **MARKET_DAY_ORDER_KWARGS
                     )
-                try:
-                    self.trading_client.submit_order(order)
-                    logging.info(
+                adjustments.append((ticker, side, order, fractionable_flag, price))
+
+            # Sells are submitted as a first wave, but fills are not awaited:
+            # the ordering is best-effort and buys may still be rejected for
+            # buying power until the sell proceeds settle
+            adjustments.sort(key=lambda item: item[1] != OrderSide.SELL)
+            sell_count = sum(1 for item in adjustments if item[1] == OrderSide.SELL)
+            orders = [order for _, _, order, _, _ in adjustments]
+            results = (self._submit_orders(orders[:sell_count])
+                       + self._submit_orders(orders[sell_count:]))
+            invalidate_positions_cache(self.trading_client)
+            first_error: Exception | None = None
+            for (ticker, side, order, fractionable_flag, price), exc in zip(adjustments, results):
+                if exc is None:
+                    logger.info(
                         "Adjusted %s by %s using %s (target $%.2f, price %.2f)",
                         ticker,
                         side.name,
@@ -404,31 +519,32 @@ class BaseMomentumStrategy:
                         target_value,
                         price
                     )
-                except APIError as exc:
-                    if self._is_pdt_error(exc):
-                        logging.warning(
-                            "Adjustment for %s blocked by PDT protection; skipping ticker",
-                            ticker
-                        )
-                        failed_adjustments.append((ticker, "PDT protection"))
-                        continue
-                    raise
+                elif isinstance(exc, APIError) and self._is_pdt_error(exc):
+                    logger.warning(
+                        "Adjustment for %s blocked by PDT protection; skipping ticker",
+                        ticker
+                    )
+                    failed_adjustments.append((ticker, "PDT protection"))
+                elif first_error is None:
+                    first_error = exc
+            if first_error is not None:
+                raise first_error
 
             if failed_adjustments:
-                logging.warning(
+                logger.warning(
                     "Skipped %d adjustment(s) due to PDT: %s",
                     len(failed_adjustments),
                     failed_adjustments
                 )
 
-            logging.info("Portfolio rebalancing completed successfully")
+            logger.info("Portfolio rebalancing completed successfully")
 
         except APIError as exc:
             if self._is_pdt_error(exc):
                 # Если PDT все же всплыл вне точечной обработки
-                logging.warning("Rebalance encountered PDT protection: %s", exc)
+                logger.warning("Rebalance encountered PDT protection: %s", exc)
             else:
-                logging.error("Error during rebalancing: %s", exc, exc_info=True)
+                logger.error("Error during rebalancing: %s", exc, exc_info=True)
                 raise
         except Exception as exc:  # pylint: disable=broad-exception-caught
-            logging.error("Error during rebalancing: %s", exc, exc_info=True)
+            logger.error("Error during rebalancing: %s", exc, exc_info=True)
@@ -9,12 +9,18 @@ from alpaca.data.historical import StockHistoricalDataClient
 from alpaca.data.requests import StockBarsRequest, StockLatestTradeRequest
 from alpaca.data.timeframe import TimeFrame
 from alpaca.trading.client import TradingClient
-from alpaca.trading.enums import OrderSide, OrderType, TimeInForce
+from alpaca.trading.enums import OrderSide
 from alpaca.trading.requests import MarketOrderRequest
 
 import config
-from core.data_loader import load_market_data
-from core.utils import retry_on_exception, get_positions
+from core.data_loader import get_close_prices, load_market_data
+from core.utils import (
+    diff_tickers, retry_on_exception, get_positions, invalidate_positions_cache,
+    wait_for_closures,
+)
+from strategies.base import MARKET_DAY_ORDER_KWARGS
+
+logger = logging.getLogger(__name__)
 
 if TYPE_CHECKING:
     from core.investor_manager import InvestorManager
@@ -69,7 +75,7 @@ class LiveStrategy:
                     if price > 0:
                         prices[symbol] = price
         except Exception as exc:  # pylint: disable=broad-exception-caught
-            logging.warning(
+            logger.warning(
                 "Failed bulk latest price lookup for %d tickers: %s",
                 len(tickers),
                 exc
@@ -86,7 +92,7 @@ class LiveStrategy:
                     if price > 0:
                         prices[symbol] = price
             except Exception as exc:  # pylint: disable=broad-exception-caught
-                logging.warning("Failed price lookup for %s: %s", symbol, exc)
+                logger.warning("Failed price lookup for %s: %s", symbol, exc)
 
         return prices
 
@@ -113,14 +119,14 @@ class LiveStrategy:
 
                 tradable.append(ticker)
             except Exception as exc:  # pylint: disable=broad-exception-caught
-                logging.warning(
+                logger.warning(
                     "Skip %s: failed to fetch asset status (%s)",
                     ticker, exc
                 )
                 skipped.append((ticker, 'lookup_failed'))
 
         if skipped:
-            logging.warning(
+            logger.warning(
                 "Skipping %d non-tradable assets: %s",
                 len(skipped),
                 [(t, s) for t, s in skipped]
@@ -147,7 +153,7 @@ class LiveStrategy:
 
         data = cast(pd.DataFrame, data)  # type: ignore[assignment]
         # Calculate momentum for all tickers: (last_price / first_price - 1)
-        close_prices = data.xs('Close', level=0, axis=1)  # type: ignore[attr-defined]
+        close_prices = get_close_prices(data)
         momentum = (close_prices.iloc[-1] / close_prices.iloc[0] - 1)  # type: ignore[attr-defined]
         # Filter to only tickers in self.tickers, then get top_count
         momentum = cast(pd.Series, momentum)  # type: ignore[assignment]
@@ -167,18 +173,18 @@ class LiveStrategy:
         for ticker in positions:
             try:
                 self.trading_client.close_position(ticker)
-                logging.info("Position %s closed", ticker)
+                logger.info("Position %s closed", ticker)
             except Exception as exc:  # pylint: disable=broad-exception-caught
-                logging.error(
+                logger.error(
                     "Error closing position %s: %s",
                     ticker,
                     exc,
-                    exc_info=True
+                    exc_info=logger.isEnabledFor(logging.DEBUG)
                 )
                 failed_closures.append((ticker, str(exc)))
 
         if failed_closures:
-            logging.warning(
+            logger.warning(
                 "Failed to close %d position(s): %s",
                 len(failed_closures),
                 [(t, e.split('\n')[0]) for t, e in failed_closures]
@@ -193,6 +199,9 @@ class LiveStrategy:
             cash_per_position: Position size in dollars
         """
         price_lookup = self._preload_last_prices(tickers)
+        # Fixed order fields are built once per call, not per ticker
+        notional = round(cash_per_position, 2)
+        buy_kwargs = {**MARKET_DAY_ORDER_KWARGS, 'side': OrderSide.BUY}
         failed_opens = []
         for ticker in tickers:
             try:
@@ -200,18 +209,12 @@ class LiveStrategy:
                 fractionable_flag = bool(getattr(asset, 'fractionable', True))
 
                 if fractionable_flag:
-                    order = MarketOrderRequest(
-                        symbol=ticker,
-                        notional=round(cash_per_position, 2),
-                        side=OrderSide.BUY,
-                        type=OrderType.MARKET,
-                        time_in_force=TimeInForce.DAY
-                    )
+                    order = MarketOrderRequest(symbol=ticker, notional=notional, **buy_kwargs)
                 else:
                     price = price_lookup.get(ticker, 0.0)
                     qty = int(cash_per_position // price) if price > 0 else 0
                     if price <= 0 or qty <= 0:
-                        logging.warning(
+                        logger.warning(
                             "Skipping %s: cannot place whole-share order (price=%.2f, cash=%.2f)",
                             ticker,
                             price,
@@ -220,15 +223,9 @@ class LiveStrategy:
                         failed_opens.append((ticker, "no_qty_for_whole_share"))
                         continue
 
-                    order = MarketOrderRequest(
-                        symbol=ticker,
-                        qty=qty,
-                        side=OrderSide.BUY,
-                        type=OrderType.MARKET,
-                        time_in_force=TimeInForce.DAY
-                    )
+                    order = MarketOrderRequest(symbol=ticker, qty=qty, **buy_kwargs)
                 self.trading_client.submit_order(order)
-                logging.info(
+                logger.info(
                     "Opened position %s using %s (cash target $%.2f, price %.2f)",
                     ticker,
                     "notional" if fractionable_flag else f"qty={order.qty}",  # type: ignore[attr-defined]
@@ -236,16 +233,16 @@ class LiveStrategy:
                     price_lookup.get(ticker, 0.0)
                 )
             except Exception as exc:  # pylint: disable=broad-exception-caught
-                logging.error(
+                logger.error(
                     "Error opening position %s: %s",
                     ticker,
                     exc,
-                    exc_info=True
+                    exc_info=logger.isEnabledFor(logging.DEBUG)
                 )
                 failed_opens.append((ticker, str(exc)))
 
         if failed_opens:
-            logging.warning(
+            logger.warning(
                 "Failed to open %d position(s): %s",
                 len(failed_opens),
                 [(t, e.split('\n')[0]) for t, e in failed_opens]
@@ -254,13 +251,13 @@ class LiveStrategy:
     def rebalance(self) -> None:
         """Rebalance portfolio with investor accounts."""
         try:
-            logging.info("Starting LiveStrategy portfolio rebalancing with investors")
+            logger.info("Starting LiveStrategy portfolio rebalancing with investors")
 
             # 1. Обработать pending операции
             if self.investor_manager:
-                logging.info("Processing pending investor operations")
+                logger.info("Processing pending investor operations")
                 pending_results = self.investor_manager.process_pending_operations()
-                logging.info(
+                logger.info(
                     "Processed %d pending operations",
                     pending_results.get('processed', 0)
                 )
@@ -283,10 +280,10 @@ class LiveStrategy:
                 account_capital = allocations[account_name]['total']
 
                 if account_capital <= 0:
-                    logging.info("No capital in %s account, skipping", account_name)
+                    logger.info("No capital in %s account, skipping", account_name)
                     continue
 
-                logging.info(
+                logger.info(
                     "Rebalancing %s account with capital $%.2f",
                     account_name, account_capital
                 )
@@ -298,9 +295,9 @@ class LiveStrategy:
                 top_tickers = self._calculate_signals(account_tickers)
                 top_tickers = self._filter_tradable_tickers(top_tickers)
                 if not top_tickers:
-                    logging.warning("No tradable tickers for %s after filtering, skipping", account_name)
+                    logger.warning("No tradable tickers for %s after filtering, skipping", account_name)
                     continue
-                logging.info(
+                logger.info(
                     "Top %d stocks for %s: %s",
                     self.top_count, account_name, ', '.join(top_tickers[:5])
                 )
@@ -310,11 +307,11 @@ class LiveStrategy:
                 current_positions_set = set(broker_positions)
 
                 # Определить какие позиции закрыть и открыть
-                top_tickers_set = set(top_tickers)
-                positions_to_close = list(current_positions_set - top_tickers_set)
-                positions_to_open = list(top_tickers_set - current_positions_set)
+                positions_to_close, positions_to_open = diff_tickers(
+                    current_positions_set, top_tickers
+                )
 
-                logging.info(
+                logger.info(
                     "Account %s: close %d, open %d positions (broker fact: %d)",
                     account_name, len(positions_to_close), len(positions_to_open),
                     len(current_positions_set)
@@ -323,13 +320,14 @@ class LiveStrategy:
                 # Закрыть ненужные позиции
                 if positions_to_close:
                     self._close_account_positions(account_name, positions_to_close)
-                    time.sleep(2)
+                    invalidate_positions_cache(self.trading_client)
+                    self._wait_for_closures(positions_to_close, timeout=2.0)
 
                 # Открыть новые позиции
                 if positions_to_open:
                     position_size = account_capital / len(positions_to_open)
                     if position_size < 1:
-                        logging.warning(
+                        logger.warning(
                             "Position size too small for %s: $%.2f",
                             account_name, position_size
                         )
@@ -338,6 +336,7 @@ class LiveStrategy:
                     self._open_account_positions(
                         account_name, positions_to_open, position_size
                     )
+                    invalidate_positions_cache(self.trading_client)
 
             # 4. Проверить контрольные суммы (критично: при несоответствии падаем)
             if self.investor_manager:
@@ -345,7 +344,7 @@ class LiveStrategy:
                     self.trading_client
                 )
                 if not is_valid:
-                    logging.error("Balance integrity check failed: %s", msg)
+                    logger.error("Balance integrity check failed: %s", msg)
                     raise ValueError(msg)
 
             # 5. Сохранить snapshot
@@ -357,10 +356,10 @@ class LiveStrategy:
                     datetime.now(ny_tz)
                 )
 
-            logging.info("LiveStrategy portfolio rebalancing completed successfully")
+            logger.info("LiveStrategy portfolio rebalancing completed successfully")
 
         except Exception as exc:  # pylint: disable=broad-exception-caught
-            logging.error("Error during rebalancing: %s", exc, exc_info=True)
+            logger.error("Error during rebalancing: %s", exc, exc_info=True)
             raise
 
     # ==================== ВСПОМОГАТЕЛЬНЫЕ МЕТОДЫ ====================
@@ -383,20 +382,18 @@ class LiveStrategy:
         try:
             data = load_market_data()
         except Exception as exc:
-            logging.error("Error loading market data: %s", exc)
+            logger.error("Error loading market data: %s", exc)
             return tickers[:self.top_count]  # Fallback
 
         if data is None or data.empty or 'Close' not in data.columns.get_level_values(0):  # type: ignore
-            logging.warning("No data for signals calculation")
+            logger.warning("No data for signals calculation")
             return tickers[:self.top_count]
 
         data = cast(pd.DataFrame, data)  # type: ignore
         try:
             # Calculate momentum for all tickers, but select only from provided tickers
-            momentum = (data.xs('Close', level=0, axis=1)  # type: ignore[attr-defined]
-                        .dropna(axis='columns')  # type: ignore
-                        .pct_change(periods=len(data)-1)  # type: ignore
-                        .iloc[-1])  # type: ignore
+            close_prices = get_close_prices(data).dropna(axis=1, how='any')
+            momentum = close_prices.iloc[-1] / close_prices.iloc[0] - 1
             # Filter to only tickers in the provided list, then get top_count
             momentum = cast(pd.Series, momentum)  # type: ignore[assignment]
             momentum_filtered = momentum[momentum.index.isin(tickers)]
@@ -405,7 +402,7 @@ class LiveStrategy:
                     .index
                     .tolist())
         except Exception as exc:
-            logging.error("Error calculating signals: %s", exc)
+            logger.error("Error calculating signals: %s", exc)
             return tickers[:self.top_count]
 
     def _get_investor_positions(self, account_name: str) -> List[str]:
@@ -430,13 +427,24 @@ class LiveStrategy:
                             if float(row.get('total_shares_after', 0)) > 0:
                                 positions.add(row['ticker'])
             except Exception as exc:
-                logging.error(
+                logger.error(
                     "Error reading trades for %s: %s",
                     investor_name, exc
                 )
 
         return list(positions)
 
+    def _wait_for_closures(self, tickers: List[str], timeout: float = 2.0,
+                           poll_interval: float = 0.2) -> None:
+        """Дождаться, пока закрытые тикеры исчезнут из позиций брокера.
+
+        Args:
+            tickers: Тикеры, отправленные на закрытие
+            timeout: Максимальное время ожидания (сек)
+            poll_interval: Пауза между опросами (сек)
+        """
+        wait_for_closures(self.trading_client, tickers, timeout, poll_interval)
+
     def _close_account_positions(self, account_name: str,
                                 positions: List[str]) -> None:
         """Закрыть позиции счета."""
@@ -448,7 +456,7 @@ class LiveStrategy:
             try:
                 total_shares = snapshot.get(ticker, 0.0)
                 self.trading_client.close_position(ticker)
-                logging.info(
+                logger.info(
                     "Closed %s position from %s account",
                     ticker, account_name
                 )
@@ -474,7 +482,7 @@ class LiveStrategy:
                         )
 
             except Exception as exc:
-                logging.error(
+                logger.error(
                     "Error closing %s from %s: %s",
                     ticker, account_name, exc
                 )
@@ -485,10 +493,13 @@ class LiveStrategy:
         """Открыть новые позиции на счете."""
         tickers = self._filter_tradable_tickers(tickers)
         if not tickers:
-            logging.warning("No tradable tickers to open in %s", account_name)
+            logger.warning("No tradable tickers to open in %s", account_name)
             return
 
         price_lookup = self._preload_last_prices(tickers)
+        # Fixed order fields are built once per call, not per ticker
+        notional = round(cash_per_position, 2)
+        buy_kwargs = {**MARKET_DAY_ORDER_KWARGS, 'side': OrderSide.BUY}
         failed_opens = []
         for ticker in tickers:
             try:
@@ -496,18 +507,12 @@ class LiveStrategy:
                 fractionable_flag = bool(getattr(asset, 'fractionable', True))
 
                 if fractionable_flag:
-                    order = MarketOrderRequest(
-                        symbol=ticker,
-                        notional=round(cash_per_position, 2),
-                        side=OrderSide.BUY,
-                        type=OrderType.MARKET,
-                        time_in_force=TimeInForce.DAY
-                    )
+                    order = MarketOrderRequest(symbol=ticker, notional=notional, **buy_kwargs)
                 else:
                     price = price_lookup.get(ticker, 0.0)
                     qty = int(cash_per_position // price) if price > 0 else 0
                     if price <= 0 or qty <= 0:
-                        logging.warning(
+                        logger.warning(
                             "Skipping %s in %s: cannot place whole-share order (price=%.2f, cash=%.2f)",
                             ticker,
                             account_name,
@@ -517,25 +522,19 @@ class LiveStrategy:
                         failed_opens.append((ticker, "no_qty_for_whole_share"))
                         continue
 
-                    order = MarketOrderRequest(
-                        symbol=ticker,
-                        qty=qty,
-                        side=OrderSide.BUY,
-                        type=OrderType.MARKET,
-                        time_in_force=TimeInForce.DAY
-                    )
+                    order = MarketOrderRequest(symbol=ticker, qty=qty, **buy_kwargs)
                 try:
                     order_response = self.trading_client.submit_order(order)
                 except APIError as exc:
                     if self._is_pdt_error(exc):
-                        logging.warning(
+                        logger.warning(
                             "Order for %s blocked by PDT protection; skipping ticker",
                             ticker
                         )
                         failed_opens.append((ticker, "PDT protection"))
                         continue
                     raise
-                logging.info(
+                logger.info(
                     "Opened %s in %s account using %s (cash target $%.2f, price %.2f)",
                     ticker,
                     account_name,
@@ -562,7 +561,7 @@ class LiveStrategy:
                                 time.sleep(0.5)
                             else:
                                 # Fallback: если не дождались исполнения, берем текущую рыночную цену
-                                logging.warning(
+                                logger.warning(
                                     "Order %s not filled after wait, using market price for records",
                                     order_response.id
                                 )
@@ -573,10 +572,10 @@ class LiveStrategy:
                                     price = float(trade[ticker].price)
                                     shares = float(requested_qty or (cash_per_position / price))
                                 else:
-                                    logging.error("Could not get market price for %s, skipping trade record", ticker)
+                                    logger.error("Could not get market price for %s, skipping trade record", ticker)
                                     shares = 0.0
                         except Exception as exc:  # pylint: disable=broad-exception-caught
-                            logging.error("Error getting trade info for %s: %s", ticker, exc)
+                            logger.error("Error getting trade info for %s: %s", ticker, exc)
                             shares = 0.0
 
                     if shares > 0:
@@ -586,14 +585,14 @@ class LiveStrategy:
                         )
 
             except Exception as exc:
-                logging.error(
+                logger.error(
                     "Error opening %s in %s: %s",
                     ticker, account_name, exc
                 )
                 failed_opens.append((ticker, str(exc)))
 
         if failed_opens:
-            logging.warning(
+            logger.warning(
                 "Failed to open %d position(s) in %s: %s",
                 len(failed_opens),
                 account_name,
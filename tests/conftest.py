@@ -1,8 +1,44 @@
 """Pytest configuration and fixtures."""
+import os
+import shutil
+import signal
 import subprocess
+from pathlib import Path
+import numpy as np
+import pandas as pd
 import pytest
 from types import SimpleNamespace
-from unittest.mock import MagicMock, patch
+from unittest.mock import MagicMock, Mock
+from alpaca.trading.client import TradingClient
+
+# Shared ticker literals, built once at import
+SAMPLE_TICKERS = ('AAPL', 'MSFT', 'GOOGL', 'TSLA', 'AMZN')
+MARKET_DATA_TICKERS = SAMPLE_TICKERS + (
+    'NVDA', 'META', 'NFLX', 'AMD', 'INTC', 'ORCL', 'IBM', 'CSCO', 'ADBE', 'CRM',
+)
+# 250 consecutive days built with numpy, no date_range offset machinery
+DATES_250 = pd.DatetimeIndex(
+    np.datetime64("2024-01-01") + np.arange(250).astype("timedelta64[D]"),
+    name="Date",
+)
+
+
+def _find_bot_pids():
+    """Return PIDs of running `bot.py` processes via /proc (None if /proc is unavailable)."""
+    proc = Path("/proc")
+    if not proc.is_dir():
+        return None
+    pids = []
+    for entry in proc.iterdir():
+        if not entry.name.isdigit() or int(entry.name) == os.getpid():
+            continue
+        try:
+            args = (entry / "cmdline").read_bytes().split(b"\0")
+        except OSError:
+            continue
+        if any(os.path.basename(arg) == b"bot.py" for arg in args):
+            pids.append(int(entry.name))
+    return pids
 
 
 def pytest_sessionstart(session):
@@ -11,9 +47,23 @@ def pytest_sessionstart(session):
     Kills any running instance of the bot to ensure a clean environment.
     """
     try:
-        # Kill any process matching "bot.py" (more robust than "python bot.py")
-        subprocess.run(["pkill", "-f", "bot.py"], check=False)
-        print("\n[INFO] Killed running bot instances (if any).")
+        pids = _find_bot_pids()
+        if pids is None:
+            # No /proc (macOS): fall back to pkill when it exists
+            if shutil.which("pkill"):
+                subprocess.run(["pkill", "-f", "bot.py"], check=False)
+            return
+        killed = []
+        for pid in pids:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except OSError as e:
+                # Process already exited or belongs to another user
+                print(f"\n[WARNING] Failed to kill bot instance {pid}: {e}")
+                continue
+            killed.append(pid)
+        if killed:
+            print(f"\n[INFO] Killed running bot instances: {killed}")
     except Exception as e:
         print(f"\n[WARNING] Failed to kill bot instances: {e}")
 
@@ -21,8 +71,10 @@ def pytest_sessionstart(session):
 @pytest.fixture
 def mock_trading_client():
     """Mock Alpaca trading client."""
-    client = MagicMock()
-    client.get_account.return_value = MagicMock(
+    # Spec'd mock: attribute set is fixed by TradingClient, typos fail fast
+    client = Mock(spec=TradingClient)
+    # Plain value object: no nested MagicMock tree for account data
+    client.get_account.return_value = SimpleNamespace(
         portfolio_value=100000.0,
         cash=50000.0
     )
@@ -36,23 +88,39 @@ def mock_strategy():
     """Mock trading strategy."""
     strategy = MagicMock()
     strategy.rebalance.return_value = None
-    strategy.get_signals.return_value = ['AAPL', 'MSFT', 'GOOGL', 'TSLA', 'AMZN']
+    strategy.get_signals.return_value = list(SAMPLE_TICKERS)
     return strategy
 
 
 @pytest.fixture
-def mock_data_loader():
+def mock_data_loader(monkeypatch):
     """Mock market data helpers exported inside core.alpaca_bot."""
-    with patch('core.alpaca_bot.get_snp500_tickers') as mock_get_tickers, \
-            patch('core.alpaca_bot.load_market_data') as mock_load_market_data:
-        mock_get_tickers.return_value = [
-            'AAPL', 'MSFT', 'GOOGL', 'TSLA', 'AMZN'
-        ] * 2
-        mock_load_market_data.return_value = None
-        yield SimpleNamespace(
-            get_snp500_tickers=mock_get_tickers,
-            load_market_data=mock_load_market_data,
-        )
+    mock_get_tickers = MagicMock(return_value=list(SAMPLE_TICKERS * 2))
+    mock_load_market_data = MagicMock(return_value=None)
+    monkeypatch.setattr('core.alpaca_bot.get_snp500_tickers', mock_get_tickers)
+    monkeypatch.setattr('core.alpaca_bot.load_market_data', mock_load_market_data)
+    return SimpleNamespace(
+        get_snp500_tickers=mock_get_tickers,
+        load_market_data=mock_load_market_data,
+    )
+
+
+@pytest.fixture(scope="session")
+def market_data_template():
+    """Close-блок в формате yfinance (250 дней x 15 тикеров), строится один раз за сессию."""
+    tickers = list(MARKET_DATA_TICKERS)
+    index = DATES_250
+    # Ticker i grows linearly by i% over the window: momentum ranks are known
+    growth = np.linspace(0.0, 1.0, len(index))[:, None] * np.arange(len(tickers)) / 100
+    prices = 100.0 * (1.0 + growth)
+    columns = pd.MultiIndex.from_product([['Close'], tickers])
+    return pd.DataFrame(prices, index=index, columns=columns)
+
+
+@pytest.fixture
+def market_data(market_data_template):
+    """Изолированная копия рыночных данных для теста."""
+    return market_data_template.copy(deep=True)
 
 
 @pytest.fixture
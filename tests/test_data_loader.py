@@ -0,0 +1,57 @@
+"""Tests for core.data_loader cache helpers."""
+import pickle
+
+import pytest
+
+from core import data_loader
+
+
+@pytest.fixture
+def cache_file(tmp_path, monkeypatch, market_data):
+    """Временный pickle-кэш с Close-блоком."""
+    path = tmp_path / "cache.pkl"
+    path.write_bytes(pickle.dumps(market_data))
+
+    monkeypatch.setattr(data_loader, "CACHE_FILE", path)
+    monkeypatch.setattr(data_loader, "_memory_cache", None)
+    return path
+
+
+def test_load_from_cache_reuses_memory_copy(cache_file, monkeypatch):
+    """Повторная загрузка неизмененного файла не должна распаковывать pickle снова."""
+    first = data_loader._load_from_cache()
+
+    def fail_load(_file):
+        raise AssertionError("pickle.load should not be called again")
+
+    monkeypatch.setattr(data_loader.pickle, "load", fail_load)
+
+    assert data_loader._load_from_cache() is first
+
+
+def test_clear_cache_drops_memory_copy(cache_file):
+    """clear_cache удаляет и файл, и копию в памяти."""
+    data_loader._load_from_cache()
+
+    data_loader.clear_cache()
+
+    assert data_loader._memory_cache is None
+    assert not cache_file.exists()
+
+
+def test_get_close_prices_returns_ticker_columns(cache_file, market_data):
+    """Close-блок должен иметь тикеры в качестве колонок."""
+    close = data_loader.get_close_prices(data_loader._load_from_cache())
+
+    assert list(close.columns) == list(market_data['Close'].columns)
+
+
+def test_save_to_cache_roundtrip(cache_file, market_data, monkeypatch):
+    """Данные, сохраненные в кэш, читаются обратно без изменений."""
+    data_loader._save_to_cache(market_data)
+    monkeypatch.setattr(data_loader, "_memory_cache", None)
+
+    loaded = data_loader._load_from_cache()
+
+    assert loaded.equals(market_data)
+    assert loaded is not market_data
@@ -8,93 +8,113 @@
 4. Расчет positions_value и P&L
 """
 import csv
+import io
+import os
+import shutil
 import pytest
 from datetime import datetime
-from pathlib import Path
-from unittest.mock import MagicMock, patch
-from decimal import Decimal
 
-from core.investor_manager import InvestorManager, Investor
-import pytz
+from core.investor_manager import InvestorManager, NY_TIMEZONE
 
-NY_TIMEZONE = pytz.timezone('America/New_York')
+# Ожидаемые суммы для депозитов Alexey $10,000 / Alex $5,000 / Cherry $10,000
+TOTAL_DEPOSITS = 25000.0
+EXPECTED_LOW = 11250.0      # 45%
+EXPECTED_MEDIUM = 8750.0    # 35%
+EXPECTED_HIGH = 5000.0      # 20%
+CHERRY_LOW_RATIO = 4500.0 / EXPECTED_LOW
 
 
-@pytest.fixture
-def temp_investors_dir(tmp_path):
-    """Создать временную директорию для тестирования."""
-    investors_dir = tmp_path / "data" / "investors"
-    investors_dir.mkdir(parents=True, exist_ok=True)
+def _write_csv_file(path, header, rows):
+    """Записать небольшой CSV одним системным вызовом write."""
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(header)
+    writer.writerows(rows)
+
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        os.write(fd, buf.getvalue().encode('utf-8'))
+    finally:
+        os.close(fd)
+
+
+@pytest.fixture(scope="session")
+def scaffold_dir(tmp_path_factory):
+    """Шаблон рабочей директории, создается один раз за сессию."""
+    return tmp_path_factory.mktemp("investors_scaffold")
+
+
+@pytest.fixture(scope="session")
+def temp_investors_dir(scaffold_dir):
+    """Создать директории инвесторов в шаблоне."""
+    investors_dir = scaffold_dir / "data" / "investors"
+    for investor_name in ['Alexey', 'Alex', 'Cherry']:
+        (investors_dir / investor_name).mkdir(parents=True, exist_ok=True)
     return investors_dir
 
 
-@pytest.fixture
-def registry_file(tmp_path):
-    """Создать временный файл реестра инвесторов."""
-    registry_path = tmp_path / "investors_registry.csv"
+@pytest.fixture(scope="session")
+def registry_file(scaffold_dir):
+    """Создать файл реестра инвесторов в шаблоне."""
+    registry_path = scaffold_dir / "investors_registry.csv"
 
     # Создать реестр с тремя инвесторами
-    with open(registry_path, 'w', newline='', encoding='utf-8') as f:
-        writer = csv.DictWriter(f, fieldnames=[
-            'name', 'creation_date', 'fee_percent', 'is_fee_receiver',
-            'high_watermark', 'last_fee_date', 'status'
-        ])
-        writer.writeheader()
-        writer.writerows([
-            {
-                'name': 'Alexey',
-                'creation_date': '2025-01-01',
-                'fee_percent': '0.0',
-                'is_fee_receiver': 'True',
-                'high_watermark': '0.0',
-                'last_fee_date': '2025-01-01',
-                'status': 'active'
-            },
-            {
-                'name': 'Alex',
-                'creation_date': '2025-01-01',
-                'fee_percent': '0.0',
-                'is_fee_receiver': 'True',
-                'high_watermark': '0.0',
-                'last_fee_date': '2025-01-01',
-                'status': 'active'
-            },
-            {
-                'name': 'Cherry',
-                'creation_date': '2025-01-15',
-                'fee_percent': '20.0',
-                'is_fee_receiver': 'False',
-                'high_watermark': '10000.0',
-                'last_fee_date': '2025-01-01',
-                'status': 'active'
-            }
-        ])
+    _write_csv_file(
+        registry_path,
+        ['name', 'creation_date', 'fee_percent', 'is_fee_receiver',
+         'high_watermark', 'last_fee_date', 'status'],
+        [
+            ['Alexey', '2025-01-01', '0.0', 'True', '0.0', '2025-01-01', 'active'],
+            ['Alex', '2025-01-01', '0.0', 'True', '0.0', '2025-01-01', 'active'],
+            ['Cherry', '2025-01-15', '20.0', 'False', '10000.0', '2025-01-01', 'active'],
+        ],
+    )
 
     return registry_path
 
 
-@pytest.fixture
-def investor_manager(tmp_path, registry_file, monkeypatch):
-    """Создать InvestorManager с временными директориями."""
-    # Изменить рабочую директорию
-    monkeypatch.chdir(tmp_path)
+@pytest.fixture(scope="class")
+def investor_manager(tmp_path_factory, scaffold_dir, temp_investors_dir, registry_file):
+    """Создать InvestorManager в копии шаблона (один на класс тестов)."""
+    workdir = tmp_path_factory.mktemp("investors")
+    shutil.copytree(scaffold_dir, workdir, dirs_exist_ok=True)
 
-    manager = InvestorManager(str(registry_file))
-    manager.investors_dir = tmp_path / "data" / "investors"
-    manager.investors_dir.mkdir(parents=True, exist_ok=True)
+    return InvestorManager(
+        str(workdir / registry_file.name),
+        investors_dir=str(workdir / temp_investors_dir.relative_to(scaffold_dir)),
+    )
 
-    # Создать директории для инвесторов
-    for investor_name in ['Alexey', 'Alex', 'Cherry']:
-        investor_dir = manager.investors_dir / investor_name
-        investor_dir.mkdir(parents=True, exist_ok=True)
 
-    return manager
+@pytest.fixture(autouse=True)
+def _rollback(investor_manager, temp_investors_dir):
+    """Вернуть файлы инвесторов к шаблону после каждого теста."""
+    yield
+
+    shutil.rmtree(investor_manager.investors_dir)
+    shutil.copytree(temp_investors_dir, investor_manager.investors_dir)
+    investor_manager.clear_caches()
+
+
+@pytest.fixture
+def mark_completed(investor_manager):
+    """Внести депозиты и сразу провести их pending операции."""
+    def _deposit_completed(deposits):
+        now = datetime.now(NY_TIMEZONE)
+        for investor_name, amount in deposits.items():
+            investor_manager.deposit(investor_name, amount, date=now)
+            investor_manager._process_investor_pending_ops(investor_name)
+
+    return _deposit_completed
 
 
 class TestDepositAndDistribution:
     """Тесты для депозитов и распределения сделок."""
 
-    def test_deposit_default_allocation(self, investor_manager):
+    @pytest.mark.parametrize(
+        "account, expected_amount",
+        [('low', 4500.0), ('medium', 3500.0), ('high', 2000.0)],
+    )
+    def test_deposit_default_allocation(self, investor_manager, account, expected_amount):
         """
         Тест: Депозит инвестора распределяется по умолчанию 45/35/20.
 
@@ -120,38 +140,21 @@ class TestDepositAndDistribution:
         operations_file = investor_manager.investors_dir / investor_name / 'operations.csv'
         assert operations_file.exists(), "Файл operations.csv должен существовать"
 
-        operations = []
         with open(operations_file, 'r') as f:
-            reader = csv.DictReader(f)
-            operations = list(reader)
+            operations = list(csv.DictReader(f))
 
         assert len(operations) == 3, f"Должно быть 3 операции, но есть {len(operations)}"
 
-        # Проверить каждую операцию
+        # Проверить операцию счета
         operations_by_account = {op['account']: op for op in operations}
-
-        # LOW: 45% = $4,500
-        low_op = operations_by_account.get('low')
-        assert low_op is not None, "Операция для LOW должна существовать"
-        assert float(low_op['amount']) == 4500.0, f"LOW должен быть $4,500, но {float(low_op['amount'])}"
-        assert low_op['operation'] == 'deposit'
-        assert low_op['status'] == 'pending'
-
-        # MEDIUM: 35% = $3,500
-        medium_op = operations_by_account.get('medium')
-        assert medium_op is not None, "Операция для MEDIUM должна существовать"
-        assert float(medium_op['amount']) == 3500.0, f"MEDIUM должен быть $3,500"
-        assert medium_op['operation'] == 'deposit'
-        assert medium_op['status'] == 'pending'
-
-        # HIGH: 20% = $2,000
-        high_op = operations_by_account.get('high')
-        assert high_op is not None, "Операция для HIGH должна существовать"
-        assert float(high_op['amount']) == 2000.0, f"HIGH должен быть $2,000"
-        assert high_op['operation'] == 'deposit'
-        assert high_op['status'] == 'pending'
-
-    def test_distribute_trade_proportional(self, investor_manager):
+        op = operations_by_account.get(account)
+        assert op is not None, f"Операция для {account.upper()} должна существовать"
+        assert float(op['amount']) == pytest.approx(expected_amount), \
+            f"{account.upper()} должен быть ${expected_amount:,.0f}, но {float(op['amount'])}"
+        assert op['operation'] == 'deposit'
+        assert op['status'] == 'pending'
+
+    def test_distribute_trade_proportional(self, investor_manager, mark_completed):
         """
         Тест: Сделки распределяются пропорционально капиталу инвесторов.
 
@@ -166,26 +169,8 @@ class TestDepositAndDistribution:
         - Alex получит: 100 * 20% = 20 акций
         - Cherry получит: 100 * 40% = 40 акций
         """
-        # ARRANGE
-        now = datetime.now(NY_TIMEZONE)
-
-        # Создать депозиты для всех инвесторов
-        for investor_name, amount in [('Alexey', 10000), ('Alex', 5000), ('Cherry', 10000)]:
-            investor_manager.deposit(investor_name, amount, date=now)
-            # Mark as completed
-            ops_file = investor_manager.investors_dir / investor_name / 'operations.csv'
-            rows = []
-            with open(ops_file, 'r') as f:
-                reader = csv.DictReader(f)
-                rows = list(reader)
-            for row in rows:
-                row['status'] = 'completed'
-                if row['operation'] == 'deposit' and row['account'] == 'low':
-                    row['balance_after'] = row['amount']
-            with open(ops_file, 'w', newline='') as f:
-                writer = csv.DictWriter(f, fieldnames=rows[0].keys() if rows else [])
-                writer.writeheader()
-                writer.writerows(rows)
+        # ARRANGE - Создать депозиты для всех инвесторов
+        mark_completed({'Alexey': 10000, 'Alex': 5000, 'Cherry': 10000})
 
         # ACT - Распределить сделку
         investor_manager.distribute_trade_to_investors(
@@ -219,17 +204,13 @@ class TestDepositAndDistribution:
             actual_amount = float(trade['amount'])
             actual_total_shares = float(trade['total_shares_after'])
 
-            print(f"\n{investor_name}:")
-            print(f"  Expected: {expected['shares']} shares @ $100 = ${expected['cost']}")
-            print(f"  Actual: {actual_shares} shares @ ${actual_price} = ${actual_amount}")
-
-            assert actual_shares == pytest.approx(expected['shares'], abs=0.01), \
+            assert actual_shares == pytest.approx(expected['shares']), \
                 f"{investor_name}: ожидается {expected['shares']} акций, получено {actual_shares}"
-            assert actual_price == 100.0
-            assert actual_amount == pytest.approx(expected['cost'], abs=0.01)
-            assert actual_total_shares == pytest.approx(expected['shares'], abs=0.01)
+            assert actual_price == pytest.approx(100.0)
+            assert actual_amount == pytest.approx(expected['cost'])
+            assert actual_total_shares == pytest.approx(expected['shares'])
 
-    def test_balance_calculation_with_positions(self, investor_manager):
+    def test_balance_calculation_with_positions(self, investor_manager, mark_completed):
         """
         Тест: Расчет баланса инвестора с учетом positions_value.
 
@@ -255,26 +236,8 @@ class TestDepositAndDistribution:
         - Alex получит: 10 * ($2,250/$11,250) = 2 акции
         - Cherry получит: 10 * ($4,500/$11,250) = 4 акции
         """
-        # ARRANGE
-        now = datetime.now(NY_TIMEZONE)
-
-        # Все три инвестора вносят деньги
-        for investor_name, amount in [('Alexey', 10000), ('Alex', 5000), ('Cherry', 10000)]:
-            investor_manager.deposit(investor_name, amount, date=now)
-
-            # Mark as completed
-            ops_file = investor_manager.investors_dir / investor_name / 'operations.csv'
-            rows = []
-            with open(ops_file, 'r') as f:
-                reader = csv.DictReader(f)
-                rows = list(reader)
-            for row in rows:
-                row['status'] = 'completed'
-                row['balance_after'] = row['amount']
-            with open(ops_file, 'w', newline='') as f:
-                writer = csv.DictWriter(f, fieldnames=rows[0].keys())
-                writer.writeheader()
-                writer.writerows(rows)
+        # ARRANGE - Все три инвестора вносят деньги
+        mark_completed({'Alexey': 10000, 'Alex': 5000, 'Cherry': 10000})
 
         # Покупка 10 акций AAPL @ $100 = $1,000 на LOW
         investor_manager.distribute_trade_to_investors(
@@ -290,44 +253,28 @@ class TestDepositAndDistribution:
         all_balances = investor_manager.get_all_balances()
 
         # ASSERT - Проверить Cherry
-        print(f"\nCherry Balance:")
-        print(f"  LOW:")
-        print(f"    cash: ${cherry_balance['low']['cash']:.2f}")
-        print(f"    positions_value: ${cherry_balance['low']['positions_value']:.2f}")
-        print(f"    total: ${cherry_balance['low']['total_value']:.2f}")
-        print(f"  MEDIUM:")
-        print(f"    cash: ${cherry_balance['medium']['cash']:.2f}")
-        print(f"    total: ${cherry_balance['medium']['total_value']:.2f}")
-        print(f"  HIGH:")
-        print(f"    cash: ${cherry_balance['high']['cash']:.2f}")
-        print(f"    total: ${cherry_balance['high']['total_value']:.2f}")
-        print(f"  TOTAL: ${cherry_balance['total_value']:.2f}")
-
         # Cherry внес $10,000, и это не изменилось
         assert cherry_balance['total_value'] == pytest.approx(10000.0, abs=1.0), \
             f"Total value должна быть $10,000, но {cherry_balance['total_value']}"
 
         # На LOW: покупил AAPL на $1,000, значит cash = $4,500 - $1,000 = $3,500
-        expected_cash_low = 4500.0 - (10.0 * 100.0 * (4500.0 / 11250.0))
+        expected_cash_low = 4500.0 - (10.0 * 100.0 * CHERRY_LOW_RATIO)
         assert cherry_balance['low']['cash'] == pytest.approx(expected_cash_low, abs=1.0), \
             f"Cash на LOW должна быть ~$3,600, но {cherry_balance['low']['cash']}"
 
         # Проверить целостность по всем инвесторам
-        print(f"\nAll Balances:")
         total_virtual = 0.0
         for investor_name, balance_info in all_balances.items():
-            print(f"  {investor_name}: ${balance_info['total_value']:.2f}")
             total_virtual += balance_info['total_value']
-        print(f"  TOTAL: ${total_virtual:.2f}")
 
-        assert total_virtual == pytest.approx(25000.0, abs=1.0), \
+        assert total_virtual == pytest.approx(TOTAL_DEPOSITS, abs=1.0), \
             f"Total virtual баланс должен быть $25,000, но {total_virtual}"
 
 
 class TestPnLCalculation:
     """Тесты для расчета P&L."""
 
-    def test_pnl_with_price_increase(self, investor_manager):
+    def test_pnl_with_price_increase(self, investor_manager, mark_completed):
         """
         Тест: Расчет P&L при росте цены.
 
@@ -338,22 +285,7 @@ class TestPnLCalculation:
         - Unrealized P&L = (120-100) * 100 = $2,000
         """
         # ARRANGE
-        now = datetime.now(NY_TIMEZONE)
-        investor_manager.deposit('Alexey', 10000.0, date=now)
-
-        # Mark as completed
-        ops_file = investor_manager.investors_dir / 'Alexey' / 'operations.csv'
-        rows = []
-        with open(ops_file, 'r') as f:
-            reader = csv.DictReader(f)
-            rows = list(reader)
-        for row in rows:
-            row['status'] = 'completed'
-            row['balance_after'] = row['amount']
-        with open(ops_file, 'w', newline='') as f:
-            writer = csv.DictWriter(f, fieldnames=rows[0].keys())
-            writer.writeheader()
-            writer.writerows(rows)
+        mark_completed({'Alexey': 10000.0})
 
         # Покупка
         investor_manager.distribute_trade_to_investors(
@@ -372,11 +304,6 @@ class TestPnLCalculation:
             )
 
         # ASSERT
-        print(f"\nAlexy P&L with price increase to $120:")
-        print(f"  positions_value: ${positions_value}")
-        print(f"  unrealized_pnl: ${unrealized_pnl}")
-        print(f"  realized_pnl: ${realized_pnl}")
-
         # Alexey имеет все $10,000 на low (100%)
         # Он получит 100 * 100% = 100 акций
         assert positions_value == pytest.approx(100 * 120, abs=0.01), \
@@ -384,7 +311,7 @@ class TestPnLCalculation:
         assert unrealized_pnl == pytest.approx(100 * 20, abs=0.01), \
             "unrealized_pnl должна быть $2,000"
 
-    def test_balance_integrity_check(self, investor_manager):
+    def test_balance_integrity_check(self, investor_manager, mark_completed):
         """
         Тест: Проверка целостности баланса (контрольные суммы).
 
@@ -399,27 +326,8 @@ class TestPnLCalculation:
         1. SUM(cash всех инвесторов) = SUM(deposits) - SUM(withdrawals) - SUM(fees)
         2. SUM(positions всех инвесторов) = SUM(покупок) * share - SUM(продаж) * share
         """
-        # ARRANGE
-        now = datetime.now(NY_TIMEZONE)
-
-        # Создать депозиты
-        for investor_name, amount in [('Alexey', 10000), ('Alex', 5000), ('Cherry', 10000)]:
-            investor_manager.deposit(investor_name, amount, date=now)
-
-        # Mark as completed
-        for investor_name in ['Alexey', 'Alex', 'Cherry']:
-            ops_file = investor_manager.investors_dir / investor_name / 'operations.csv'
-            rows = []
-            with open(ops_file, 'r') as f:
-                reader = csv.DictReader(f)
-                rows = list(reader)
-            for row in rows:
-                row['status'] = 'completed'
-                row['balance_after'] = row['amount']
-            with open(ops_file, 'w', newline='') as f:
-                writer = csv.DictWriter(f, fieldnames=rows[0].keys())
-                writer.writeheader()
-                writer.writerows(rows)
+        # ARRANGE - Создать депозиты
+        mark_completed({'Alexey': 10000, 'Alex': 5000, 'Cherry': 10000})
 
         # ACT - Получить все балансы
         all_balances = investor_manager.get_all_balances()
@@ -429,12 +337,7 @@ class TestPnLCalculation:
             b['total_value'] for b in all_balances.values()
         )
 
-        print(f"\nBalance Integrity Check:")
-        for investor_name, balance in all_balances.items():
-            print(f"  {investor_name}: ${balance['total_value']:.2f}")
-        print(f"  TOTAL: ${total_virtual:.2f}")
-
-        assert total_virtual == pytest.approx(25000.0, abs=1.0), \
+        assert total_virtual == pytest.approx(TOTAL_DEPOSITS, abs=1.0), \
             f"Total virtual баланс должен быть $25,000, но {total_virtual}"
 
         # Проверить распределение по счетам
@@ -448,10 +351,6 @@ class TestPnLCalculation:
             b['accounts']['high']['total_value'] for b in all_balances.values()
         )
 
-        print(f"  LOW: ${low_total:.2f} (45% expected: ${25000 * 0.45:.2f})")
-        print(f"  MEDIUM: ${medium_total:.2f} (35% expected: ${25000 * 0.35:.2f})")
-        print(f"  HIGH: ${high_total:.2f} (20% expected: ${25000 * 0.20:.2f})")
-
-        assert low_total == pytest.approx(25000 * 0.45, abs=1.0)
-        assert medium_total == pytest.approx(25000 * 0.35, abs=1.0)
-        assert high_total == pytest.approx(25000 * 0.20, abs=1.0)
+        assert low_total == pytest.approx(EXPECTED_LOW)
+        assert medium_total == pytest.approx(EXPECTED_MEDIUM)
+        assert high_total == pytest.approx(EXPECTED_HIGH)
@@ -3,43 +3,64 @@ Unit тесты для InvestorManager - методы расчета позиц
 """
 import csv
 import pytest
-from datetime import datetime
-from pathlib import Path
 
-from core.investor_manager import InvestorManager
-import pytz
+from core.investor_manager import TRADES_HEADER, InvestorManager, _split_amount
 
-NY_TIMEZONE = pytz.timezone('America/New_York')
+TRADES_CSV_HEADER = ",".join(TRADES_HEADER) + "\n"
 
 
-@pytest.fixture
-def investor_manager_with_trades(tmp_path, monkeypatch):
-    """Создать InvestorManager с тестовыми данными trades.csv."""
-    monkeypatch.chdir(tmp_path)
+def _write_trades(path, rows):
+    """Записать trades.csv из кортежей значений (значения без запятых)."""
+    path.write_text(
+        TRADES_CSV_HEADER + "".join(",".join(row) + "\n" for row in rows)
+    )
+
+
+# Сценарии сделок AAPL на счете low
+_BUY_100_AT_150 = ('2025-01-15', '10:00:00', 'low', 'BUY', 'AAPL', '100.0', '150.00', '15000.00', '100.0', 'Buy')
+BUY_ONLY = (_BUY_100_AT_150,)
+BUY_SELL_PROFIT = (
+    _BUY_100_AT_150,
+    ('2025-01-20', '14:00:00', 'low', 'SELL', 'AAPL', '100.0', '160.00', '16000.00', '0.0', 'Sell'),
+)
+BUY_SELL_LOSS = (
+    _BUY_100_AT_150,
+    ('2025-01-20', '14:00:00', 'low', 'SELL', 'AAPL', '100.0', '140.00', '14000.00', '0.0', 'Sell'),
+)
+BUY_PARTIAL_SELL = (
+    _BUY_100_AT_150,
+    ('2025-01-20', '14:00:00', 'low', 'SELL', 'AAPL', '50.0', '160.00', '8000.00', '50.0', 'Sell'),
+)
+
+
+@pytest.fixture(scope="module")
+def _investor_manager_base(tmp_path_factory):
+    """InvestorManager с реестром и директорией инвестора (один на модуль)."""
+    base_dir = tmp_path_factory.mktemp("im")
 
     # Создать реестр
-    registry_path = tmp_path / "investors_registry.csv"
+    registry_path = base_dir / "investors_registry.csv"
     with open(registry_path, 'w', newline='', encoding='utf-8') as f:
-        writer = csv.DictWriter(f, fieldnames=[
+        writer = csv.writer(f)
+        writer.writerow([
             'name', 'creation_date', 'fee_percent', 'is_fee_receiver',
             'high_watermark', 'last_fee_date', 'status'
         ])
-        writer.writeheader()
-        writer.writerow({
-            'name': 'TestInvestor',
-            'creation_date': '2025-01-01',
-            'fee_percent': '0.0',
-            'is_fee_receiver': 'False',
-            'high_watermark': '0.0',
-            'last_fee_date': '2025-01-01',
-            'status': 'active'
-        })
-
-    manager = InvestorManager(str(registry_path))
-    manager.investors_dir = tmp_path / "data" / "investors"
-    manager.investors_dir.mkdir(parents=True, exist_ok=True)
-    investor_dir = manager.investors_dir / "TestInvestor"
-    investor_dir.mkdir(parents=True, exist_ok=True)
+        writer.writerow(['TestInvestor', '2025-01-01', '0.0', 'False', '0.0', '2025-01-01', 'active'])
+
+    manager = InvestorManager(str(registry_path), investors_dir=str(base_dir / "data" / "investors"))
+    return manager, manager.investors_dir / "TestInvestor"
+
+
+@pytest.fixture
+def investor_manager_with_trades(_investor_manager_base):
+    """InvestorManager с пустой директорией инвестора для каждого теста."""
+    manager, investor_dir = _investor_manager_base
+
+    # Удалить файлы предыдущего теста
+    for path in investor_dir.iterdir():
+        path.unlink()
+    manager.clear_caches()
 
     return manager
 
@@ -62,24 +83,9 @@ class TestPositionsCalculation:
         """
         # ARRANGE - Создать trades.csv с одной покупкой
         trades_file = investor_manager_with_trades.investors_dir / "TestInvestor" / "trades.csv"
-        with open(trades_file, 'w', newline='') as f:
-            writer = csv.DictWriter(f, fieldnames=[
-                'date', 'timestamp', 'account', 'action', 'ticker',
-                'shares', 'price', 'amount', 'total_shares_after', 'notes'
-            ])
-            writer.writeheader()
-            writer.writerow({
-                'date': '2025-01-15',
-                'timestamp': '10:00:00',
-                'account': 'low',
-                'action': 'BUY',
-                'ticker': 'AAPL',
-                'shares': '100.0',
-                'price': '150.00',
-                'amount': '15000.00',
-                'total_shares_after': '100.0',
-                'notes': 'Test buy'
-            })
+        _write_trades(trades_file, [
+            ('2025-01-15', '10:00:00', 'low', 'BUY', 'AAPL', '100.0', '150.00', '15000.00', '100.0', 'Test buy'),
+        ])
 
         # ACT
         positions = investor_manager_with_trades._get_investor_positions('TestInvestor', 'low')
@@ -98,38 +104,10 @@ class TestPositionsCalculation:
         """
         # ARRANGE
         trades_file = investor_manager_with_trades.investors_dir / "TestInvestor" / "trades.csv"
-        with open(trades_file, 'w', newline='') as f:
-            writer = csv.DictWriter(f, fieldnames=[
-                'date', 'timestamp', 'account', 'action', 'ticker',
-                'shares', 'price', 'amount', 'total_shares_after', 'notes'
-            ])
-            writer.writeheader()
-            writer.writerows([
-                {
-                    'date': '2025-01-15',
-                    'timestamp': '10:00:00',
-                    'account': 'low',
-                    'action': 'BUY',
-                    'ticker': 'AAPL',
-                    'shares': '100.0',
-                    'price': '150.00',
-                    'amount': '15000.00',
-                    'total_shares_after': '100.0',
-                    'notes': 'Buy'
-                },
-                {
-                    'date': '2025-01-20',
-                    'timestamp': '14:00:00',
-                    'account': 'low',
-                    'action': 'SELL',
-                    'ticker': 'AAPL',
-                    'shares': '30.0',
-                    'price': '160.00',
-                    'amount': '4800.00',
-                    'total_shares_after': '70.0',
-                    'notes': 'Sell'
-                }
-            ])
+        _write_trades(trades_file, [
+            ('2025-01-15', '10:00:00', 'low', 'BUY', 'AAPL', '100.0', '150.00', '15000.00', '100.0', 'Buy'),
+            ('2025-01-20', '14:00:00', 'low', 'SELL', 'AAPL', '30.0', '160.00', '4800.00', '70.0', 'Sell'),
+        ])
 
         # ACT
         positions = investor_manager_with_trades._get_investor_positions('TestInvestor', 'low')
@@ -149,50 +127,11 @@ class TestPositionsCalculation:
         """
         # ARRANGE
         trades_file = investor_manager_with_trades.investors_dir / "TestInvestor" / "trades.csv"
-        with open(trades_file, 'w', newline='') as f:
-            writer = csv.DictWriter(f, fieldnames=[
-                'date', 'timestamp', 'account', 'action', 'ticker',
-                'shares', 'price', 'amount', 'total_shares_after', 'notes'
-            ])
-            writer.writeheader()
-            writer.writerows([
-                {
-                    'date': '2025-01-15',
-                    'timestamp': '10:00:00',
-                    'account': 'low',
-                    'action': 'BUY',
-                    'ticker': 'AAPL',
-                    'shares': '100.0',
-                    'price': '150.00',
-                    'amount': '15000.00',
-                    'total_shares_after': '100.0',
-                    'notes': 'Buy AAPL'
-                },
-                {
-                    'date': '2025-01-16',
-                    'timestamp': '11:00:00',
-                    'account': 'low',
-                    'action': 'BUY',
-                    'ticker': 'MSFT',
-                    'shares': '50.0',
-                    'price': '300.00',
-                    'amount': '15000.00',
-                    'total_shares_after': '50.0',
-                    'notes': 'Buy MSFT'
-                },
-                {
-                    'date': '2025-01-20',
-                    'timestamp': '14:00:00',
-                    'account': 'low',
-                    'action': 'SELL',
-                    'ticker': 'AAPL',
-                    'shares': '20.0',
-                    'price': '160.00',
-                    'amount': '3200.00',
-                    'total_shares_after': '80.0',
-                    'notes': 'Sell AAPL'
-                }
-            ])
+        _write_trades(trades_file, [
+            ('2025-01-15', '10:00:00', 'low', 'BUY', 'AAPL', '100.0', '150.00', '15000.00', '100.0', 'Buy AAPL'),
+            ('2025-01-16', '11:00:00', 'low', 'BUY', 'MSFT', '50.0', '300.00', '15000.00', '50.0', 'Buy MSFT'),
+            ('2025-01-20', '14:00:00', 'low', 'SELL', 'AAPL', '20.0', '160.00', '3200.00', '80.0', 'Sell AAPL'),
+        ])
 
         # ACT
         positions = investor_manager_with_trades._get_investor_positions('TestInvestor', 'low')
@@ -215,261 +154,174 @@ class TestPnLCalculation:
         assert realized_pnl == 0.0
         assert unrealized_pnl == 0.0
 
-    def test_unrealized_pnl_price_increase(self, investor_manager_with_trades):
-        """
-        Тест: Unrealized P&L при росте цены.
-
-        Сценарий:
-        - BUY 100 AAPL @ $150 = $15,000
-        - Текущая цена: $160
-        - Ожидаемо: positions_value = $16,000, unrealized_pnl = $1,000
-        """
+    @pytest.mark.parametrize(
+        "rows, current_prices, expected",
+        [
+            # BUY 100 @ $150, цена $160: unrealized = $1,000
+            pytest.param(BUY_ONLY, {'AAPL': 160.0}, (16000.0, 0.0, 1000.0),
+                         id="unrealized_price_increase"),
+            # BUY 100 @ $150, цена $140: unrealized = -$1,000
+            pytest.param(BUY_ONLY, {'AAPL': 140.0}, (14000.0, 0.0, -1000.0),
+                         id="unrealized_price_decrease"),
+            # SELL 100 @ $160: realized = $1,000
+            pytest.param(BUY_SELL_PROFIT, None, (0.0, 1000.0, 0.0),
+                         id="realized_sell_at_profit"),
+            # SELL 100 @ $140: realized = -$1,000
+            pytest.param(BUY_SELL_LOSS, None, (0.0, -1000.0, 0.0),
+                         id="realized_sell_at_loss"),
+            # SELL 50 @ $160 (realized $500), остаток 50 по $170 (unrealized $1,000)
+            pytest.param(BUY_PARTIAL_SELL, {'AAPL': 170.0}, (8500.0, 500.0, 1000.0),
+                         id="combined_realized_and_unrealized"),
+        ],
+    )
+    def test_pnl(self, investor_manager_with_trades, rows, current_prices, expected):
+        """Тест: (positions_value, realized_pnl, unrealized_pnl) по сценарию сделок."""
         # ARRANGE
         trades_file = investor_manager_with_trades.investors_dir / "TestInvestor" / "trades.csv"
-        with open(trades_file, 'w', newline='') as f:
-            writer = csv.DictWriter(f, fieldnames=[
-                'date', 'timestamp', 'account', 'action', 'ticker',
-                'shares', 'price', 'amount', 'total_shares_after', 'notes'
-            ])
-            writer.writeheader()
-            writer.writerow({
-                'date': '2025-01-15',
-                'timestamp': '10:00:00',
-                'account': 'low',
-                'action': 'BUY',
-                'ticker': 'AAPL',
-                'shares': '100.0',
-                'price': '150.00',
-                'amount': '15000.00',
-                'total_shares_after': '100.0',
-                'notes': 'Buy'
-            })
+        _write_trades(trades_file, rows)
 
         # ACT
-        current_prices = {'AAPL': 160.0}
-        positions_value, realized_pnl, unrealized_pnl = \
-            investor_manager_with_trades._calculate_positions_value_and_pnl(
-                'TestInvestor', 'low', current_prices
-            )
+        result = investor_manager_with_trades._calculate_positions_value_and_pnl(
+            'TestInvestor', 'low', current_prices
+        )
 
         # ASSERT
-        assert positions_value == pytest.approx(16000.0, abs=0.01)
-        assert realized_pnl == pytest.approx(0.0, abs=0.01)
-        assert unrealized_pnl == pytest.approx(1000.0, abs=0.01)
+        assert result == pytest.approx(expected, abs=0.01)
 
-    def test_unrealized_pnl_price_decrease(self, investor_manager_with_trades):
-        """
-        Тест: Unrealized P&L при падении цены.
 
-        Сценарий:
-        - BUY 100 AAPL @ $150 = $15,000
-        - Текущая цена: $140
-        - Ожидаемо: positions_value = $14,000, unrealized_pnl = -$1,000
-        """
-        # ARRANGE
-        trades_file = investor_manager_with_trades.investors_dir / "TestInvestor" / "trades.csv"
-        with open(trades_file, 'w', newline='') as f:
-            writer = csv.DictWriter(f, fieldnames=[
-                'date', 'timestamp', 'account', 'action', 'ticker',
-                'shares', 'price', 'amount', 'total_shares_after', 'notes'
-            ])
-            writer.writeheader()
-            writer.writerow({
-                'date': '2025-01-15',
-                'timestamp': '10:00:00',
-                'account': 'low',
-                'action': 'BUY',
-                'ticker': 'AAPL',
-                'shares': '100.0',
-                'price': '150.00',
-                'amount': '15000.00',
-                'total_shares_after': '100.0',
-                'notes': 'Buy'
-            })
+class TestCsvCache:
+    """Тесты кэша распарсенных CSV."""
 
-        # ACT
-        current_prices = {'AAPL': 140.0}
-        positions_value, realized_pnl, unrealized_pnl = \
-            investor_manager_with_trades._calculate_positions_value_and_pnl(
-                'TestInvestor', 'low', current_prices
-            )
+    def test_repeated_read_reuses_rows(self, investor_manager_with_trades):
+        """Повторное чтение неизмененного файла возвращает те же строки."""
+        manager = investor_manager_with_trades
+        manager._record_trade('TestInvestor', 'low', 'BUY', 'AAPL', 10.0, 150.0)
+        trades_file = manager.investors_dir / "TestInvestor" / "trades.csv"
 
-        # ASSERT
-        assert positions_value == pytest.approx(14000.0, abs=0.01)
-        assert realized_pnl == pytest.approx(0.0, abs=0.01)
-        assert unrealized_pnl == pytest.approx(-1000.0, abs=0.01)
+        _, first = manager._read_csv(trades_file)
+        _, second = manager._read_csv(trades_file)
 
-    def test_realized_pnl_sell_at_profit(self, investor_manager_with_trades):
-        """
-        Тест: Realized P&L при продаже с прибылью.
+        assert second is first
 
-        Сценарий:
-        - BUY 100 AAPL @ $150 = $15,000
-        - SELL 100 AAPL @ $160 = $16,000
-        - Ожидаемо: realized_pnl = $1,000, positions_value = 0, unrealized_pnl = 0
-        """
-        # ARRANGE
-        trades_file = investor_manager_with_trades.investors_dir / "TestInvestor" / "trades.csv"
-        with open(trades_file, 'w', newline='') as f:
-            writer = csv.DictWriter(f, fieldnames=[
-                'date', 'timestamp', 'account', 'action', 'ticker',
-                'shares', 'price', 'amount', 'total_shares_after', 'notes'
-            ])
-            writer.writeheader()
-            writer.writerows([
-                {
-                    'date': '2025-01-15',
-                    'timestamp': '10:00:00',
-                    'account': 'low',
-                    'action': 'BUY',
-                    'ticker': 'AAPL',
-                    'shares': '100.0',
-                    'price': '150.00',
-                    'amount': '15000.00',
-                    'total_shares_after': '100.0',
-                    'notes': 'Buy'
-                },
-                {
-                    'date': '2025-01-20',
-                    'timestamp': '14:00:00',
-                    'account': 'low',
-                    'action': 'SELL',
-                    'ticker': 'AAPL',
-                    'shares': '100.0',
-                    'price': '160.00',
-                    'amount': '16000.00',
-                    'total_shares_after': '0.0',
-                    'notes': 'Sell'
-                }
-            ])
+    def test_append_invalidates_cache(self, investor_manager_with_trades):
+        """Дозапись в файл должна приводить к перечитыванию."""
+        manager = investor_manager_with_trades
+        manager._record_trade('TestInvestor', 'low', 'BUY', 'AAPL', 10.0, 150.0)
+        assert manager._get_investor_positions('TestInvestor', 'low') == {'AAPL': 10.0}
 
-        # ACT
-        positions_value, realized_pnl, unrealized_pnl = \
-            investor_manager_with_trades._calculate_positions_value_and_pnl(
-                'TestInvestor', 'low'
-            )
+        manager._record_trade('TestInvestor', 'low', 'BUY', 'AAPL', 5.0, 160.0)
 
-        # ASSERT
-        assert positions_value == pytest.approx(0.0, abs=0.01)
-        assert realized_pnl == pytest.approx(1000.0, abs=0.01)
-        assert unrealized_pnl == pytest.approx(0.0, abs=0.01)
+        assert manager._get_investor_positions('TestInvestor', 'low') == {'AAPL': 15.0}
 
-    def test_realized_pnl_sell_at_loss(self, investor_manager_with_trades):
-        """
-        Тест: Realized P&L при продаже с убытком.
 
-        Сценарий:
-        - BUY 100 AAPL @ $150 = $15,000
-        - SELL 100 AAPL @ $140 = $14,000
-        - Ожидаемо: realized_pnl = -$1,000
-        """
-        # ARRANGE
-        trades_file = investor_manager_with_trades.investors_dir / "TestInvestor" / "trades.csv"
-        with open(trades_file, 'w', newline='') as f:
-            writer = csv.DictWriter(f, fieldnames=[
-                'date', 'timestamp', 'account', 'action', 'ticker',
-                'shares', 'price', 'amount', 'total_shares_after', 'notes'
-            ])
-            writer.writeheader()
-            writer.writerows([
-                {
-                    'date': '2025-01-15',
-                    'timestamp': '10:00:00',
-                    'account': 'low',
-                    'action': 'BUY',
-                    'ticker': 'AAPL',
-                    'shares': '100.0',
-                    'price': '150.00',
-                    'amount': '15000.00',
-                    'total_shares_after': '100.0',
-                    'notes': 'Buy'
-                },
-                {
-                    'date': '2025-01-20',
-                    'timestamp': '14:00:00',
-                    'account': 'low',
-                    'action': 'SELL',
-                    'ticker': 'AAPL',
-                    'shares': '100.0',
-                    'price': '140.00',
-                    'amount': '14000.00',
-                    'total_shares_after': '0.0',
-                    'notes': 'Sell'
-                }
-            ])
+class TestSplitAmount:
+    """Тесты распределения суммы по счетам."""
 
-        # ACT
-        positions_value, realized_pnl, unrealized_pnl = \
-            investor_manager_with_trades._calculate_positions_value_and_pnl(
-                'TestInvestor', 'low'
-            )
+    @pytest.mark.parametrize("amount", [10000.0, 0.01, 333.33, 1234.57])
+    def test_parts_sum_exactly_to_deposit(self, amount):
+        """Части депозита в центах в сумме равны исходной сумме."""
+        parts = _split_amount(amount)
 
-        # ASSERT
-        assert positions_value == pytest.approx(0.0, abs=0.01)
-        assert realized_pnl == pytest.approx(-1000.0, abs=0.01)
-        assert unrealized_pnl == pytest.approx(0.0, abs=0.01)
+        assert [acc for acc, _ in parts] == ['low', 'medium', 'high']
+        assert sum(round(part * 100) for _, part in parts) == round(amount * 100)
 
-    def test_combined_realized_and_unrealized_pnl(self, investor_manager_with_trades):
-        """
-        Тест: Комбинированный realized и unrealized P&L.
+    def test_default_split(self):
+        assert _split_amount(10000.0) == [('low', 4500.0), ('medium', 3500.0), ('high', 2000.0)]
 
-        Сценарий:
-        - BUY 100 AAPL @ $150 = $15,000
-        - SELL 50 AAPL @ $160 = $8,000 (realized PnL = $500)
-        - Остаток: 50 AAPL @ $150, текущая цена = $170
-        - Ожидаемо:
-          - realized_pnl = $500
-          - unrealized_pnl = 50 * ($170 - $150) = $1,000
-          - positions_value = 50 * $170 = $8,500
-        """
-        # ARRANGE
-        trades_file = investor_manager_with_trades.investors_dir / "TestInvestor" / "trades.csv"
-        with open(trades_file, 'w', newline='') as f:
-            writer = csv.DictWriter(f, fieldnames=[
-                'date', 'timestamp', 'account', 'action', 'ticker',
-                'shares', 'price', 'amount', 'total_shares_after', 'notes'
-            ])
-            writer.writeheader()
-            writer.writerows([
-                {
-                    'date': '2025-01-15',
-                    'timestamp': '10:00:00',
-                    'account': 'low',
-                    'action': 'BUY',
-                    'ticker': 'AAPL',
-                    'shares': '100.0',
-                    'price': '150.00',
-                    'amount': '15000.00',
-                    'total_shares_after': '100.0',
-                    'notes': 'Buy'
-                },
-                {
-                    'date': '2025-01-20',
-                    'timestamp': '14:00:00',
-                    'account': 'low',
-                    'action': 'SELL',
-                    'ticker': 'AAPL',
-                    'shares': '50.0',
-                    'price': '160.00',
-                    'amount': '8000.00',
-                    'total_shares_after': '50.0',
-                    'notes': 'Sell'
-                }
-            ])
+    @pytest.mark.parametrize("amount", [333.33, 100.01])
+    def test_withdrawal_parts_sum_exactly_to_amount(self, investor_manager_with_trades, monkeypatch, amount):
+        """Пропорциональное снятие записывает части, точно равные сумме снятия."""
+        manager = investor_manager_with_trades
+        monkeypatch.setattr(manager, 'calculate_investor_balance', lambda name: {'total_value': 1000.0})
 
-        # ACT
-        current_prices = {'AAPL': 170.0}
-        positions_value, realized_pnl, unrealized_pnl = \
-            investor_manager_with_trades._calculate_positions_value_and_pnl(
-                'TestInvestor', 'low', current_prices
-            )
+        manager.withdraw('TestInvestor', amount)
 
-        # ASSERT
-        print(f"\nCombined P&L:")
-        print(f"  positions_value: ${positions_value:.2f}")
-        print(f"  realized_pnl: ${realized_pnl:.2f}")
-        print(f"  unrealized_pnl: ${unrealized_pnl:.2f}")
-
-        assert positions_value == pytest.approx(8500.0, abs=0.01)
-        assert realized_pnl == pytest.approx(500.0, abs=0.01)
-        assert unrealized_pnl == pytest.approx(1000.0, abs=0.01)
+        with open(manager.investors_dir / "TestInvestor" / 'operations.csv', newline='') as f:
+            amounts = [row['amount'] for row in csv.DictReader(f)]
+        assert sum(round(float(part) * 100) for part in amounts) == round(amount * 100)
+
+
+class TestBalanceCache:
+    """Тесты кэша балансов."""
+
+    def test_balance_reused_until_trades_change(self, investor_manager_with_trades, monkeypatch):
+        """Баланс пересчитывается только после изменения CSV."""
+        manager = investor_manager_with_trades
+        manager._record_trade('TestInvestor', 'low', 'BUY', 'AAPL', 10.0, 150.0)
+        first = manager.calculate_investor_balance('TestInvestor')
+
+        calls = []
+        original = manager._calculate_account_balance
+
+        def counting(investor, account):
+            calls.append(account)
+            return original(investor, account)
+
+        monkeypatch.setattr(manager, '_calculate_account_balance', counting)
+
+        assert manager.calculate_investor_balance('TestInvestor') == first
+        assert calls == []
+
+        manager._record_trade('TestInvestor', 'low', 'SELL', 'AAPL', 5.0, 150.0)
+        second = manager.calculate_investor_balance('TestInvestor')
+
+        assert calls == ['low', 'medium', 'high']
+        assert second['low']['positions_value'] == pytest.approx(5 * 150.0)
+
+
+class TestProcessPendingOps:
+    """Тесты обработки pending операций."""
+
+    def test_marks_completed_and_replaces_file(self, investor_manager_with_trades):
+        """Pending операции становятся completed, временный файл не остается."""
+        manager = investor_manager_with_trades
+        manager.deposit('TestInvestor', 1000.0, account='low')
+        investor_dir = manager.investors_dir / "TestInvestor"
+
+        results = manager._process_investor_pending_ops('TestInvestor')
+
+        assert results['processed'] == 1
+        with open(investor_dir / 'operations.csv', newline='') as f:
+            statuses = [row['status'] for row in csv.DictReader(f)]
+        assert statuses == ['completed']
+        assert not (investor_dir / 'operations.csv.tmp').exists()
+
+        # После записи чтение отражает файл: все значения — строки с диска
+        _, rows = manager._read_csv(investor_dir / 'operations.csv')
+        assert all(isinstance(value, str) for row in rows for value in row)
+
+
+class TestPositionsCache:
+    """Тесты кэша позиций и P&L."""
+
+    def test_positions_cached_until_trades_change(self, investor_manager_with_trades, monkeypatch):
+        """Позиции берутся из кэша, пока trades.csv не изменился."""
+        manager = investor_manager_with_trades
+        manager._record_trade('TestInvestor', 'low', 'BUY', 'AAPL', 10.0, 150.0)
+        positions = manager._get_investor_positions('TestInvestor', 'low')
+        positions['AAPL'] = 0.0  # изменение копии не должно попасть в кэш
+
+        def fail_read(path):
+            raise AssertionError("trades.csv should not be re-read")
+
+        monkeypatch.setattr(manager, '_read_csv', fail_read)
+        assert manager._get_investor_positions('TestInvestor', 'low') == {'AAPL': 10.0}
+
+        monkeypatch.undo()
+        manager._record_trade('TestInvestor', 'low', 'SELL', 'AAPL', 4.0, 150.0)
+        assert manager._get_investor_positions('TestInvestor', 'low') == {'AAPL': 6.0}
+
+    def test_pnl_cache_keyed_by_prices(self, investor_manager_with_trades):
+        """Разные текущие цены дают разные результаты P&L."""
+        manager = investor_manager_with_trades
+        manager._record_trade('TestInvestor', 'low', 'BUY', 'AAPL', 10.0, 100.0)
+
+        _, _, unrealized_100 = manager._calculate_positions_value_and_pnl(
+            'TestInvestor', 'low', {'AAPL': 100.0}
+        )
+        _, _, unrealized_120 = manager._calculate_positions_value_and_pnl(
+            'TestInvestor', 'low', {'AAPL': 120.0}
+        )
+
+        assert unrealized_100 == pytest.approx(0.0)
+        assert unrealized_120 == pytest.approx(200.0)
@@ -59,3 +59,134 @@ def test_live_strategy_buys_whole_shares_for_non_fractionable(monkeypatch):
     order = trading_client.submit_order.call_args[0][0]
     assert getattr(order, 'qty', None) == 2
     assert getattr(order, 'notional', None) in (None, 0)
+
+
+@pytest.mark.parametrize(
+    "strategy_cls",
+    [BaseMomentumStrategy, LiveStrategy],
+)
+def test_wait_for_closures_returns_once_positions_gone(strategy_cls):
+    """Ожидание закрытия должно завершаться сразу после исчезновения позиций у брокера."""
+    trading_client = MagicMock()
+    trading_client.get_all_positions.side_effect = [
+        [SimpleNamespace(symbol='OLD', qty='1')],
+        [],
+    ]
+
+    strategy = strategy_cls(trading_client=trading_client, tickers=[], top_count=2)
+    strategy._wait_for_closures(['OLD'], timeout=5.0, poll_interval=0.01)
+
+    assert trading_client.get_all_positions.call_count == 2
+
+
+def test_base_strategy_submits_orders_concurrently_and_isolates_failures(monkeypatch):
+    """Ошибка одного ордера не должна мешать отправке остальных."""
+    trading_client = MagicMock()
+    trading_client.get_asset.return_value = SimpleNamespace(status='active', tradable=True, fractionable=True)
+
+    def submit(order):
+        if order.symbol == 'BAD':
+            raise RuntimeError("rejected")
+        return SimpleNamespace(id=order.symbol)
+
+    trading_client.submit_order.side_effect = submit
+
+    strategy = BaseMomentumStrategy(trading_client=trading_client, tickers=[])
+    monkeypatch.setattr(strategy, "_preload_last_prices", lambda tickers: {})
+
+    strategy.open_positions(['AAPL', 'BAD', 'MSFT'], cash_per_position=100.0)
+
+    submitted = {call.args[0].symbol for call in trading_client.submit_order.call_args_list}
+    assert submitted == {'AAPL', 'BAD', 'MSFT'}
+
+
+def test_base_strategy_closes_positions_concurrently_and_isolates_failures():
+    """Ошибка закрытия одной позиции не должна мешать закрытию остальных."""
+    trading_client = MagicMock()
+
+    def close(ticker):
+        if ticker == 'BAD':
+            raise RuntimeError("rejected")
+
+    trading_client.close_position.side_effect = close
+
+    strategy = BaseMomentumStrategy(trading_client=trading_client, tickers=[])
+    strategy.close_positions(['AAPL', 'BAD', 'MSFT'])
+
+    closed = {call.args[0] for call in trading_client.close_position.call_args_list}
+    assert closed == {'AAPL', 'BAD', 'MSFT'}
+
+
+def test_base_rebalance_skips_positions_within_drift_tolerance(monkeypatch):
+    """Позиция в пределах допуска от целевой стоимости не должна перекупаться."""
+    trading_client = MagicMock()
+    trading_client.get_asset.return_value = SimpleNamespace(status='active', tradable=True, fractionable=True)
+    trading_client.get_all_positions.return_value = [
+        SimpleNamespace(symbol='AAPL', qty='10', market_value='980'),
+    ]
+    trading_client.get_account.return_value = SimpleNamespace(portfolio_value='1000')
+
+    strategy = BaseMomentumStrategy(trading_client=trading_client, tickers=['AAPL'], top_count=1)
+    monkeypatch.setattr(strategy, "get_signals", lambda: ['AAPL'])
+    monkeypatch.setattr(strategy, "_preload_last_prices", lambda tickers: {})
+
+    strategy.rebalance()
+
+    trading_client.submit_order.assert_not_called()
+    # Профиль актива запрашивается один раз и для фильтра, и для расчета
+    trading_client.get_asset.assert_called_once_with('AAPL')
+
+
+def test_base_rebalance_full_exit_closes_all_in_one_request(monkeypatch):
+    """Если закрываются все позиции, используется один запрос close_all_positions."""
+    trading_client = MagicMock()
+    trading_client.get_asset.return_value = SimpleNamespace(status='active', tradable=True, fractionable=True)
+    trading_client.get_all_positions.side_effect = [
+        [SimpleNamespace(symbol='OLD1', qty='1'), SimpleNamespace(symbol='OLD2', qty='2')],
+        [],
+        [],
+    ]
+    trading_client.close_all_positions.return_value = [
+        SimpleNamespace(symbol='OLD1', status=200, body=None),
+        SimpleNamespace(symbol='OLD2', status=200, body=None),
+    ]
+    trading_client.get_account.return_value = SimpleNamespace(portfolio_value='1000')
+
+    strategy = BaseMomentumStrategy(trading_client=trading_client, tickers=['AAPL'], top_count=1)
+    monkeypatch.setattr(strategy, "get_signals", lambda: ['AAPL'])
+    monkeypatch.setattr(strategy, "_preload_last_prices", lambda tickers: {})
+
+    strategy.rebalance()
+
+    trading_client.close_all_positions.assert_called_once_with(cancel_orders=True)
+    trading_client.close_position.assert_not_called()
+
+
+@pytest.mark.parametrize(
+    "responses",
+    [
+        [SimpleNamespace(symbol='OLD1', status=None, body=None),
+         SimpleNamespace(symbol='OLD2', status=500, body='rejected')],
+        [{'symbol': 'OLD1', 'status': None, 'body': None},
+         {'symbol': 'OLD2', 'status': 500, 'body': 'rejected'}],
+    ],
+)
+def test_close_all_positions_tolerates_missing_status(responses):
+    """status=None и ответы-словари (raw data) не должны ронять полное закрытие."""
+    trading_client = MagicMock()
+    trading_client.close_all_positions.return_value = responses
+
+    strategy = BaseMomentumStrategy(trading_client=trading_client, tickers=[])
+    strategy._close_all_positions(['OLD1', 'OLD2'])
+
+    trading_client.close_position.assert_not_called()
+
+
+def test_base_strategy_ranks_signals_by_momentum(monkeypatch, market_data):
+    """get_signals возвращает top_count тикеров из self.tickers по убыванию momentum."""
+    monkeypatch.setattr("strategies.base.load_market_data", lambda: market_data)
+    strategy = BaseMomentumStrategy(
+        trading_client=MagicMock(), tickers=['AAPL', 'MSFT', 'CRM', 'ADBE'], top_count=2
+    )
+
+    assert strategy.get_signals() == ['CRM', 'ADBE']
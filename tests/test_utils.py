@@ -0,0 +1,304 @@
+"""Tests for core.utils helpers."""
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+import core.utils as utils
+from core.utils import (
+    CircuitOpenError, diff_tickers, get_positions, invalidate_positions_cache, retry_on_exception,
+    telegram_handler,
+)
+
+
+def _flaky(outcomes):
+    """Функция, которая по очереди возвращает или выбрасывает элементы outcomes."""
+    remaining = iter(outcomes)
+    calls = []
+
+    def func():
+        calls.append(None)
+        outcome = next(remaining)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    func.calls = calls
+    return func
+
+
+FAILED_TWICE = (ConnectionError("a"), TimeoutError("b"))
+FAILED_THRICE = FAILED_TWICE + (ConnectionError("c"),)
+
+
+class TestRetryOnException:
+    """Тесты декоратора повторных попыток."""
+
+    @pytest.fixture(autouse=True)
+    def _no_sleep(self, monkeypatch):
+        """Подменяет time в core.utils: sleep пишет ожидания, monotonic сдвигается на них."""
+        sleeps = []
+        monkeypatch.setattr(utils, "time", SimpleNamespace(sleep=sleeps.append, monotonic=lambda: sum(sleeps)))
+        return sleeps
+
+    @pytest.mark.parametrize(
+        "outcomes, expected_calls",
+        [
+            (("ok",), 1),
+            (FAILED_TWICE + ("ok",), 3),
+        ],
+    )
+    def test_returns_first_success(self, _no_sleep, outcomes, expected_calls):
+        func = _flaky(outcomes)
+
+        assert retry_on_exception(retries=3, delay=1)(func)() == "ok"
+        assert len(func.calls) == expected_calls
+        assert len(_no_sleep) == expected_calls - 1
+
+    def test_all_failures_reraise_last_error(self, _no_sleep):
+        func = _flaky(FAILED_THRICE)
+
+        with pytest.raises(ConnectionError, match="c"):
+            retry_on_exception(retries=3, delay=1)(func)()
+        assert len(func.calls) == 3
+        assert len(_no_sleep) == 2
+
+    def test_retry_warning_carries_error_type(self, _no_sleep, caplog):
+        func = _flaky(FAILED_TWICE + ("ok",))
+
+        with caplog.at_level("WARNING", logger="core.utils"):
+            retry_on_exception(retries=3, delay=1)(func)()
+
+        assert [record.err_type for record in caplog.records] == ['ConnectionError', 'TimeoutError']
+
+    def test_identical_arguments_share_decorator(self):
+        assert retry_on_exception() is retry_on_exception()
+        assert retry_on_exception(retries=2) is not retry_on_exception()
+
+    def test_non_transient_error_is_not_retried(self, _no_sleep):
+        func = _flaky((KeyError("Close"), "ok"))
+
+        with pytest.raises(KeyError):
+            retry_on_exception(retries=3, delay=1)(func)()
+        assert len(func.calls) == 1
+        assert not _no_sleep
+
+    def test_exponential_backoff_is_capped(self, _no_sleep):
+        func = _flaky(FAILED_THRICE + ("ok",))
+
+        retry_on_exception(retries=4, delay=1, backoff=2.0, jitter=False, cap=3)(func)()
+
+        assert _no_sleep == [1, 2, 3]
+
+    def test_deadline_stops_retrying(self, _no_sleep):
+        func = _flaky(FAILED_THRICE + ("ok",))
+
+        with pytest.raises(TimeoutError, match="b"):
+            retry_on_exception(retries=4, delay=1, backoff=2.0, jitter=False, deadline=2.5)(func)()
+        assert len(func.calls) == 2
+        assert _no_sleep == [1]
+
+    def test_coroutine_retries_with_asyncio_sleep(self, _no_sleep, monkeypatch):
+        async_sleeps = []
+
+        async def fake_sleep(wait):
+            async_sleeps.append(wait)
+
+        # Подменяется только ссылка asyncio в core.utils, а не сам модуль asyncio
+        monkeypatch.setattr(utils, "asyncio", SimpleNamespace(
+            sleep=fake_sleep,
+            iscoroutinefunction=asyncio.iscoroutinefunction,
+            wait_for=asyncio.wait_for,
+        ))
+        func = _flaky(FAILED_TWICE + ("ok",))
+
+        @retry_on_exception(retries=3, delay=1, jitter=False)
+        async def fetch():
+            return func()
+
+        assert asyncio.run(fetch()) == "ok"
+        assert async_sleeps == [1, 2]
+        assert not _no_sleep
+
+    def test_jitter_stays_within_bounds(self, _no_sleep):
+        func = _flaky(FAILED_THRICE + ("ok",))
+
+        retry_on_exception(retries=4, delay=1, backoff=1.0)(func)()
+
+        assert all(0.5 <= wait <= 1.5 for wait in _no_sleep)
+
+
+def test_coroutine_attempt_is_cancelled_at_deadline():
+    """Зависшая корутина прерывается по общему бюджету времени."""
+    @retry_on_exception(retries=1, deadline=0.05)
+    async def stalled():
+        await asyncio.sleep(10)
+
+    with pytest.raises(TimeoutError):
+        asyncio.run(stalled())
+
+
+class TestTelegramHandler:
+    """Тесты обработчика ошибок Telegram-команд."""
+
+    def test_failed_error_reply_does_not_escape(self):
+        message = SimpleNamespace(
+            from_user=None,
+            answer=AsyncMock(side_effect=ConnectionError("blocked")),
+        )
+
+        @telegram_handler("oops")
+        async def command(msg):
+            raise ValueError("boom")
+
+        assert asyncio.run(command(message)) is None
+        message.answer.assert_awaited_once_with("oops")
+
+
+class TestGetPositions:
+    """Тесты построения словаря позиций."""
+
+    def test_converts_qty_strings_to_float(self):
+        """Alpaca возвращает qty строкой — результат должен быть float."""
+        trading_client = MagicMock()
+        trading_client.get_all_positions.return_value = [
+            SimpleNamespace(symbol='AAPL', qty='10'),
+            SimpleNamespace(symbol='MSFT', qty='2.5'),
+        ]
+
+        positions = get_positions(trading_client)
+
+        assert positions == {'AAPL': 10.0, 'MSFT': 2.5}
+        assert all(isinstance(qty, float) for qty in positions.values())
+
+    def test_empty_account(self):
+        """Пустой счет — пустой словарь."""
+        trading_client = MagicMock()
+        trading_client.get_all_positions.return_value = []
+
+        assert get_positions(trading_client) == {}
+
+    def test_cached_until_invalidated(self):
+        """Повторный вызов в пределах TTL не ходит в API, сброс кэша — ходит."""
+        trading_client = MagicMock()
+        trading_client.get_all_positions.return_value = [SimpleNamespace(symbol='AAPL', qty='1')]
+
+        first = get_positions(trading_client)
+        first['MSFT'] = 5.0
+        assert get_positions(trading_client) == {'AAPL': 1.0}
+        assert trading_client.get_all_positions.call_count == 1
+
+        invalidate_positions_cache(trading_client)
+        get_positions(trading_client)
+        assert trading_client.get_all_positions.call_count == 2
+
+    def test_concurrent_misses_share_one_request(self):
+        """Параллельные вызовы при пустом кэше ждут уже идущий запрос, а не дублируют его."""
+        trading_client = MagicMock()
+        started = threading.Event()
+        release = threading.Event()
+
+        def slow_fetch():
+            started.set()
+            release.wait(timeout=5)
+            return [SimpleNamespace(symbol='AAPL', qty='1')]
+
+        trading_client.get_all_positions.side_effect = slow_fetch
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(get_positions(trading_client)))
+                   for _ in range(3)]
+        threads[0].start()
+        started.wait(timeout=5)
+        for thread in threads[1:]:
+            thread.start()
+        time.sleep(0.05)
+        release.set()
+        for thread in threads:
+            thread.join(timeout=5)
+
+        assert results == [{'AAPL': 1.0}] * 3
+        assert trading_client.get_all_positions.call_count == 1
+
+    @pytest.fixture
+    def breaker_clock(self, monkeypatch):
+        """Фиктивные часы core.utils с порогом срабатывания 2 и без ожиданий."""
+        clock = [0.0]
+        monkeypatch.setattr(utils, "time", SimpleNamespace(monotonic=lambda: clock[0], sleep=lambda _: None))
+        monkeypatch.setattr(utils, "_BREAKER_THRESHOLD", 2)
+        return clock
+
+    def test_ttl_counts_from_fetch_completion(self, breaker_clock):
+        """TTL отсчитывается от получения ответа, а не от начала медленного запроса."""
+        trading_client = MagicMock()
+
+        def slow_fetch():
+            breaker_clock[0] += 0.9
+            return [SimpleNamespace(symbol='AAPL', qty='1')]
+
+        trading_client.get_all_positions.side_effect = slow_fetch
+        get_positions(trading_client)
+
+        breaker_clock[0] += 0.5
+        get_positions(trading_client)
+        assert trading_client.get_all_positions.call_count == 1
+
+    def test_circuit_opens_after_repeated_failures(self, breaker_clock):
+        """После серии сбоев брокера вызовы падают сразу, без запросов к API."""
+        trading_client = MagicMock()
+        trading_client.get_all_positions.side_effect = ConnectionError("down")
+
+        for _ in range(2):
+            with pytest.raises(ConnectionError):
+                get_positions(trading_client)
+        calls = trading_client.get_all_positions.call_count
+
+        with pytest.raises(CircuitOpenError):
+            get_positions(trading_client)
+        assert trading_client.get_all_positions.call_count == calls
+
+    def test_half_open_lets_single_probe_through(self, breaker_clock):
+        """После паузы проходит один пробный вызов, остальные продолжают падать сразу."""
+        trading_client = MagicMock()
+        trading_client.get_all_positions.side_effect = ConnectionError("down")
+        for _ in range(2):
+            with pytest.raises(ConnectionError):
+                get_positions(trading_client)
+
+        breaker_clock[0] = utils._BREAKER_COOLDOWN + 1
+
+        def probe():
+            # Параллельный вызов во время пробы не должен доходить до брокера
+            with pytest.raises(CircuitOpenError):
+                get_positions(trading_client)
+            return [SimpleNamespace(symbol='AAPL', qty='1')]
+
+        trading_client.get_all_positions.side_effect = probe
+        assert get_positions(trading_client) == {'AAPL': 1.0}
+
+        # Успешная проба закрывает автомат
+        invalidate_positions_cache(trading_client)
+        trading_client.get_all_positions.side_effect = None
+        trading_client.get_all_positions.return_value = []
+        assert get_positions(trading_client) == {}
+
+
+class TestDiffTickers:
+    """Тесты разбиения тикеров на закрытие/открытие."""
+
+    def test_small_universe(self):
+        to_close, to_open = diff_tickers(['AAPL', 'OLD'], ['AAPL', 'NEW'])
+
+        assert to_close == ['OLD']
+        assert to_open == ['NEW']
+
+    def test_large_universe_matches_set_difference(self):
+        current = [f"C{i}" for i in range(200)] + ['SHARED']
+        target = [f"T{i}" for i in range(200)] + ['SHARED']
+
+        to_close, to_open = diff_tickers(current, target)
+
+        assert set(to_close) == set(current) - set(target)
+        assert set(to_open) == set(target) - set(current)